@@ -0,0 +1,24 @@
+#version 330 core
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec2 aTexCoord;
+
+// Per instance (divisor 1): model matrix rows, UV scale, UV rect in the texture
+layout (location = 2) in vec4 aModelRow0;
+layout (location = 3) in vec4 aModelRow1;
+layout (location = 4) in vec4 aModelRow2;
+layout (location = 5) in vec4 aModelRow3;
+layout (location = 6) in vec2 aUvScale;
+layout (location = 7) in vec4 aUvRect; // u, v, width, height (atlas sprite or whole texture)
+
+out vec2 TexCoord;
+
+uniform mat4 view;
+uniform mat4 projection;
+
+void main()
+{
+    // mat4() takes columns, so building it from rows gives the transpose
+    mat4 model = transpose(mat4(aModelRow0, aModelRow1, aModelRow2, aModelRow3));
+    gl_Position = projection * view * model * vec4(aPos, 1.0);
+    TexCoord = aUvRect.xy + aTexCoord * aUvScale * aUvRect.zw;
+}
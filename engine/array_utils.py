@@ -0,0 +1,49 @@
+import numpy as np
+
+def expand_ranges(starts, ends):
+    """
+    Flattens the index ranges [starts[i], ends[i]) into one array.
+    Returns (owner, index): owner[n] is the i whose range index[n] came from.
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    counts = np.maximum(np.asarray(ends, dtype=np.intp) - starts, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    owner = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    index = np.arange(total) - np.repeat(first - starts, counts)
+    return owner, index
+
+
+def cell_keys(cx, cy):
+    # Packs integer cell coordinates into one sortable int64 key
+    return (np.asarray(cx, dtype=np.int64) + (1 << 20)) * (1 << 21) + (np.asarray(cy, dtype=np.int64) + (1 << 20))
+
+
+def cross_ranges(starts_a, counts_a, starts_b, counts_b):
+    """
+    Every (a, b) combination between paired runs: for each i, all indices of
+    [starts_a[i], +counts_a[i]) against all of [starts_b[i], +counts_b[i]).
+    """
+    counts_a = np.asarray(counts_a, dtype=np.intp)
+    counts_b = np.asarray(counts_b, dtype=np.intp)
+    pair_counts = counts_a * counts_b
+    total = int(pair_counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    owner = np.repeat(np.arange(len(pair_counts)), pair_counts)
+    local = np.arange(total) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    width = counts_b[owner]
+    a = np.asarray(starts_a, dtype=np.intp)[owner] + local // width
+    b = np.asarray(starts_b, dtype=np.intp)[owner] + local % width
+    return a, b
+
+
+def ordered_pairs(a, b):
+    # Same pairs with the smaller slot first
+    return np.minimum(a, b), np.maximum(a, b)
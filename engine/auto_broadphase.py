@@ -0,0 +1,117 @@
+import numpy as np
+from engine.array_utils import cell_keys
+from engine.broadphase import Broadphase
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
+from engine.spatial_grid import SpatialGrid
+from engine.sweep_and_prune import SweepAndPrune
+from engine.loose_quadtree import LooseQuadtree
+from engine.sharded_broadphase import ShardedBroadphase
+
+BROADPHASES = {
+    "grid": SpatialGrid,
+    "sap": SweepAndPrune,
+    "quadtree": LooseQuadtree,
+    "sharded": ShardedBroadphase, # Sort-and-sweep pairs on a ShardPool, never picked by auto
+}
+
+BROADPHASE_MODES = ["auto"] + list(BROADPHASES)
+
+
+def choose_broadphase(store, members):
+    """
+    Picks a backend name from entity count and size distribution.
+
+    - Few entities: sort-and-sweep, nothing to build.
+    - Mixed sizes (largest diameter >= 4x the median): loose quadtree, so small
+      entities are not padded by the big ones.
+    - Clustered (crowded cells at a uniform cell size): loose quadtree.
+    - Otherwise: uniform grid.
+    """
+    count = len(members)
+    if count <= AutoBroadphase.small_count:
+        return "sap"
+
+    half = store.local_sizes[members] * store.scales[members, :2] * 0.5
+    diameters = half.max(axis=1) * 2.0
+    median = float(np.median(diameters))
+    largest = float(diameters.max())
+    if median <= 0 or largest / median >= AutoBroadphase.size_ratio:
+        return "quadtree"
+
+    # Average occupancy of non-empty cells sized to the largest entity
+    cells = np.floor(store.positions[members, :2] / largest).astype(np.int64)
+    occupied = len(np.unique(cell_keys(cells[:, 0], cells[:, 1])))
+    if count / occupied >= AutoBroadphase.cluster_occupancy:
+        return "quadtree"
+
+    return "grid"
+
+
+def create_broadphase(mode, store, shards=None):
+    # shards: optional ShardPool, used by the "sharded" backend
+    if mode == "auto":
+        return AutoBroadphase(store)
+    if mode not in BROADPHASES:
+        raise ValueError(f"Unknown broadphase '{mode}', expected one of {BROADPHASE_MODES}")
+    if mode == "sharded":
+        return ShardedBroadphase(store, pool=shards)
+    return BROADPHASES[mode](store)
+
+
+class AutoBroadphase(Broadphase):
+    """
+    Delegates to the backend picked by choose_broadphase(), re-evaluated every
+    `reevaluate_interval` updates (populations shift as litters are born and eaten).
+    """
+    name = "auto"
+    reevaluate_interval = 120
+    small_count = 32
+    size_ratio = 4.0
+    cluster_occupancy = 8.0
+
+    def __init__(self, store, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        super().__init__(store, required_flags)
+        self.active = None
+        self.active_name = None
+        self.updates = 0
+
+    def clear(self):
+        self.active = None
+        self.active_name = None
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.active) if self.active else 0
+
+    def update(self, members=None):
+        if members is None:
+            members = self.member_slots()
+
+        if self.active is None or self.updates % self.reevaluate_interval == 0:
+            name = choose_broadphase(self.store, members) if len(members) else "grid"
+            if name != self.active_name:
+                self.active = BROADPHASES[name](self.store, required_flags=self.required_flags)
+                self.active_name = name
+        self.updates += 1
+        self.active.update(members)
+
+    def query_aabb(self, min_x, min_y, max_x, max_y):
+        if not self.active:
+            return np.empty(0, dtype=np.intp)
+        return self.active.query_aabb(min_x, min_y, max_x, max_y)
+
+    def candidate_pairs(self):
+        if not self.active:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        return self.active.candidate_pairs()
+
+    def retrieve(self, slot):
+        if not self.active:
+            return np.empty(0, dtype=np.intp)
+        return self.active.retrieve(slot)
+
+    def nearest(self, x, y, k=1, max_dist=None, required_flags=0):
+        if not self.active:
+            return super().nearest(x, y, k, max_dist, required_flags)
+        return self.active.nearest(x, y, k, max_dist, required_flags)
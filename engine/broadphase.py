@@ -0,0 +1,112 @@
+import numpy as np
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
+
+class Broadphase:
+    """
+    Base interface for collision broadphase structures over EntityStore slots.
+
+    update() refreshes the structure from the store (members are the slots with
+    required_flags set). Queries return candidate slots: a superset of the members
+    whose AABB overlaps, which callers filter exactly.
+    """
+    name = "base"
+
+    def __init__(self, store, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        self.store = store
+        self.required_flags = required_flags
+        self.extent = None
+
+    def member_slots(self):
+        flags = self.store.flags[:self.store.size]
+        return np.flatnonzero((flags & self.required_flags) == self.required_flags)
+
+    def half_extents(self, slots):
+        return self.store.local_sizes[slots] * self.store.scales[slots, :2] * 0.5
+
+    def clear(self):
+        raise NotImplementedError
+
+    def update(self, members=None):
+        raise NotImplementedError
+
+    def query_aabb(self, min_x, min_y, max_x, max_y):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def retrieve(self, slot):
+        # Candidate slots near one member (includes the slot itself)
+        x, y = self.store.positions[slot, :2]
+        half = self.half_extents(slot)
+        return self.query_aabb(x - half[0], y - half[1], x + half[0], y + half[1])
+
+    def candidate_pairs(self):
+        """
+        Candidate overlapping member pairs as two slot arrays (a, b) with a < b,
+        each pair once. The fallback asks retrieve() per member.
+        """
+        members = self.member_slots()
+        found = [self.retrieve(slot) for slot in members]
+        counts = [len(slots) for slots in found]
+        if not sum(counts):
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        a = np.repeat(members, counts)
+        b = np.concatenate(found)
+        keep = a < b
+        return a[keep], b[keep]
+
+    def nearest(self, x, y, k=1, max_dist=None, required_flags=0):
+        """
+        Expanding box search. Returns (slots, distances) for up to k members
+        sorted by center distance; only slots with all required_flags are used.
+        """
+        empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32))
+        if not len(self) or k <= 0:
+            return empty
+
+        positions = self.store.positions
+        flags = self.store.flags
+        radius = max(self.search_radius(), 1e-3)
+        limit = self.extent_radius(x, y)
+        if max_dist is not None:
+            limit = min(limit, max_dist)
+
+        while True:
+            radius = min(radius, limit)
+            slots = self.query_aabb(x - radius, y - radius, x + radius, y + radius)
+            if required_flags and len(slots):
+                slots = slots[(flags[slots] & required_flags) == required_flags]
+
+            delta = positions[slots, :2] - (x, y)
+            dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+            within = dist <= radius
+            slots = slots[within]
+            dist = dist[within]
+
+            # Done once k hits are inside the searched circle or nothing farther exists
+            if len(slots) >= k or radius >= limit:
+                break
+            radius *= 2.0
+
+        order = np.lexsort((slots, dist))[:k]
+        return slots[order], dist[order]
+
+    def search_radius(self):
+        # Initial radius for nearest(); subclasses return a typical cell size
+        return 1.0
+
+    def set_extent(self, slots):
+        # Bounding box of member centers, limits nearest() expansion
+        if len(slots):
+            pos = self.store.positions[slots, :2]
+            self.extent = (pos.min(axis=0), pos.max(axis=0))
+        else:
+            self.extent = None
+
+    def extent_radius(self, x, y):
+        if self.extent is None:
+            return 0.0
+        lo, hi = self.extent
+        return float(np.hypot(max(x - lo[0], hi[0] - x), max(y - lo[1], hi[1] - y)))
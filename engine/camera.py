@@ -47,3 +47,30 @@ class Camera:
         p[3, 2] = -(far + near) / (far - near)
         
         return p.transpose()
+
+
+def world_to_screen(points, view_matrix, proj_matrix, viewport, margin=0.0):
+    """
+    Projects world points (N, 3) to window coordinates in one matrix multiply.
+    Matrices are the ones returned by Camera (as uploaded with GL_TRUE).
+    Returns (screen, visible): screen is (N, 2) with the origin at the top left
+    (ImGui convention); visible is False for points behind the camera or more
+    than `margin` pixels outside the viewport.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    x0, y0, width, height = viewport
+
+    pv = (np.asarray(proj_matrix) @ np.asarray(view_matrix)).astype(np.float32)
+    clip = points @ pv[:, :3].T + pv[:, 3]
+    w = clip[:, 3]
+    in_front = w > 1e-6
+    ndc = clip[:, :2] / np.where(in_front, w, 1.0)[:, None]
+
+    screen = np.empty((len(points), 2), dtype=np.float32)
+    screen[:, 0] = x0 + (ndc[:, 0] + 1.0) * 0.5 * width
+    screen[:, 1] = height - (y0 + (ndc[:, 1] + 1.0) * 0.5 * height)
+
+    visible = (in_front &
+               (screen[:, 0] >= -margin) & (screen[:, 0] <= width + margin) &
+               (screen[:, 1] >= -margin) & (screen[:, 1] <= height + margin))
+    return screen, visible
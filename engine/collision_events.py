@@ -0,0 +1,85 @@
+import numpy as np
+
+EVENT_COLLISION = "collision"
+
+
+class CollisionBuffer:
+    """
+    Preallocated, array-backed collision pairs for one tick.
+    Row i is one overlapping pair: slots_a[i], slots_b[i] and their handles.
+    Capacity doubles when a tick produces more pairs than fit; it is never shrunk.
+    """
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.slots_a = np.empty(capacity, dtype=np.int64)
+        self.slots_b = np.empty(capacity, dtype=np.int64)
+        self.handles_a = np.empty(capacity, dtype=np.int64)
+        self.handles_b = np.empty(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _grow(self, min_capacity):
+        capacity = self.capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        for name in ("slots_a", "slots_b", "handles_a", "handles_b"):
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def extend(self, slots_a, slots_b, handles_a, handles_b):
+        start = self.count
+        end = start + len(slots_a)
+        if end > self.capacity:
+            self._grow(end)
+        self.slots_a[start:end] = slots_a
+        self.slots_b[start:end] = slots_b
+        self.handles_a[start:end] = handles_a
+        self.handles_b[start:end] = handles_b
+        self.count = end
+
+    def views(self):
+        n = self.count
+        return self.slots_a[:n], self.slots_b[:n], self.handles_a[:n], self.handles_b[:n]
+
+
+class CollisionBatch:
+    """
+    Pairs delivered to one subscriber, oriented so side a has the subscribed
+    kind_a and side b has kind_b. Arrays are read-only snapshots for this tick.
+    """
+    def __init__(self, scene_manager, slots_a, slots_b, handles_a, handles_b):
+        self.scene_manager = scene_manager
+        self.slots_a = slots_a
+        self.slots_b = slots_b
+        self.handles_a = handles_a
+        self.handles_b = handles_b
+
+    def __len__(self):
+        return len(self.slots_a)
+
+    def select(self, mask):
+        # Sub-batch of the pairs where mask (N,) is True
+        return CollisionBatch(self.scene_manager, self.slots_a[mask], self.slots_b[mask],
+                              self.handles_a[mask], self.handles_b[mask])
+
+    def live_pairs(self):
+        # (obj_a, obj_b) for pairs whose objects are still in the scene and not despawning
+        # (checked per pair, so removals by earlier pairs are respected)
+        scene_manager = self.scene_manager
+        resolve = scene_manager.registry.get
+        pending = scene_manager.pending_removes
+        for handle_a, handle_b in zip(self.handles_a.tolist(), self.handles_b.tolist()):
+            obj_a = resolve(handle_a)
+            obj_b = resolve(handle_b)
+            if obj_a is None or obj_b is None:
+                continue
+            if obj_a.transform.slot in pending or obj_b.transform.slot in pending:
+                continue
+            yield obj_a, obj_b
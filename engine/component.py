@@ -2,5 +2,31 @@ class Component:
     def __init__(self):
         self.owner = None
 
+    def on_attach(self):
+        # Called by Object.add_component once owner is set
+        pass
+
+    def on_added(self):
+        # Called by SceneManager.add_object once the owner is in the scene
+        pass
+
     def tick(self, dt):
         pass
+
+
+class ComponentSystem:
+    """
+    One step of SceneManager.tick. Systems run in registration order (see
+    SceneManager.register_system); each gets the in-scene components that are
+    instances of `component_type`, or an empty list when it is None (systems that
+    work on EntityStore arrays only). The base class ticks each component.
+    """
+    component_type = Component
+
+    def tick(self, components, dt):
+        for component in components:
+            component.tick(dt)
+
+    def clear(self):
+        # Called by SceneManager.clear
+        pass
@@ -0,0 +1,106 @@
+from OpenGL.GL import *
+import numpy as np
+from engine.resource_manager import ResourceManager
+
+# Line vertex: position (3 floats), color (3 floats)
+LINE_VERTEX_FLOATS = 6
+
+class DebugDraw:
+    """
+    Batched debug lines on the programmable pipeline.
+
+    add_*() calls generate line segments for many shapes at once into NumPy vertex
+    arrays; draw() uploads everything into one buffer and issues one GL_LINES
+    draw per line width, then clears the batch.
+    """
+    circle_segments = 16
+
+    def __init__(self, resources=None):
+        self.resources = resources if resources is not None else ResourceManager()
+        self.program = None
+        self.vao = None
+        self.vbo = None
+        self.capacity = 0 # Bytes allocated in vbo
+        self.batches = {} # line width -> list of (V, LINE_VERTEX_FLOATS) arrays
+
+    def clear(self):
+        self.batches = {}
+
+    def add_segments(self, starts, ends, color, width=1.0, z=0.0):
+        # starts/ends: (N, 2) endpoints; color: (r, g, b) or (N, 3)
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 2)
+        count = len(starts)
+        if not count:
+            return
+
+        vertices = np.empty((count, 2, LINE_VERTEX_FLOATS), dtype=np.float32)
+        vertices[:, 0, :2] = starts
+        vertices[:, 1, :2] = ends
+        vertices[:, :, 2] = z
+        vertices[:, :, 3:] = np.asarray(color, dtype=np.float32).reshape(-1, 1, 3)
+        self.batches.setdefault(width, []).append(vertices.reshape(-1, LINE_VERTEX_FLOATS))
+
+    def add_boxes(self, bounds, color, width=1.0):
+        # bounds: (N, 4) min_x, min_y, max_x, max_y
+        bounds = np.asarray(bounds, dtype=np.float32).reshape(-1, 4)
+        corners = bounds[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        self.add_segments(corners, np.roll(corners, -1, axis=1), color, width)
+
+    def add_circles(self, centers, radii, color, width=1.0):
+        # centers: (N, 2), radii: (N,); each circle is a closed loop of circle_segments lines
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float32).reshape(-1)
+        angles = np.arange(self.circle_segments) * (2.0 * np.pi / self.circle_segments)
+        unit = np.stack((np.cos(angles), np.sin(angles)), axis=1).astype(np.float32)
+
+        points = centers[:, None, :] + radii[:, None, None] * unit
+        self.add_segments(points, np.roll(points, -1, axis=1), color, width)
+
+    def _setup(self):
+        self.program = self.resources.load_program("assets/shaders/debug_line.vert", "assets/shaders/debug_line.frag")
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        stride = LINE_VERTEX_FLOATS * 4
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
+        glEnableVertexAttribArray(1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def draw(self, view_matrix, proj_matrix):
+        if not self.batches:
+            return
+        if self.program is None:
+            self._setup()
+
+        # One upload for every width, then one draw per width range
+        widths = list(self.batches)
+        parts = [np.concatenate(self.batches[w]) for w in widths]
+        data = np.concatenate(parts)
+        self.clear()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if data.nbytes > self.capacity:
+            self.capacity = max(data.nbytes, self.capacity * 2)
+            glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.resources.uniform_location(self.program, "view"), 1, GL_TRUE, view_matrix)
+        glUniformMatrix4fv(self.resources.uniform_location(self.program, "projection"), 1, GL_TRUE, proj_matrix)
+
+        glBindVertexArray(self.vao)
+        first = 0
+        for width, part in zip(widths, parts):
+            glLineWidth(width)
+            glDrawArrays(GL_LINES, first, len(part))
+            first += len(part)
+        glBindVertexArray(0)
+        glLineWidth(1.0)
+        glUseProgram(0)
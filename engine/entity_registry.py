@@ -0,0 +1,84 @@
+import numpy as np
+
+# Handle layout: generation in the high 32 bits, EntityStore slot in the low 32 bits
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+class EntityRegistry:
+    """
+    Live scene objects with generational handles.
+
+    `objects` is a dense list; removal swaps the last object into the hole, so
+    add/remove/lookup are all O(1) (iteration order is not insertion order).
+    A handle packs the object's store slot with the slot's generation, which is
+    bumped on every removal. Resolving a handle after its object left the scene
+    (even if the slot was reused) returns None.
+    """
+    def __init__(self):
+        self.objects = [] # Dense
+        self.by_slot = {} # EntityStore slot -> Object
+        self.dense_index = {} # EntityStore slot -> index into objects
+        self.generations = np.zeros(64, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, obj):
+        return self.by_slot.get(obj.transform.slot) is obj
+
+    def add(self, obj):
+        slot = obj.transform.slot
+        if slot >= len(self.generations):
+            grown = np.zeros(max(slot + 1, len(self.generations) * 2), dtype=np.int64)
+            grown[:len(self.generations)] = self.generations
+            self.generations = grown
+
+        self.dense_index[slot] = len(self.objects)
+        self.objects.append(obj)
+        self.by_slot[slot] = obj
+        obj.handle = (int(self.generations[slot]) << SLOT_BITS) | slot
+        return obj.handle
+
+    def remove(self, obj):
+        # Returns False if obj is not registered
+        slot = obj.transform.slot
+        if self.by_slot.get(slot) is not obj:
+            return False
+
+        # Swap-remove: move the last object into the hole
+        index = self.dense_index.pop(slot)
+        last = self.objects.pop()
+        if last is not obj:
+            self.objects[index] = last
+            self.dense_index[last.transform.slot] = index
+
+        del self.by_slot[slot]
+        self.generations[slot] += 1
+        obj.handle = None
+        return True
+
+    def clear(self):
+        # Invalidate every outstanding handle
+        for slot in self.by_slot:
+            self.generations[slot] += 1
+        for obj in self.objects:
+            obj.handle = None
+        self.objects.clear()
+        self.by_slot.clear()
+        self.dense_index.clear()
+
+    def get(self, handle):
+        # Object for a handle, or None if it is stale
+        if handle is None:
+            return None
+        slot = handle & SLOT_MASK
+        obj = self.by_slot.get(slot)
+        if obj is None or int(self.generations[slot]) != handle >> SLOT_BITS:
+            return None
+        return obj
+
+    def handles(self, slots):
+        # Current handles for an array of registered slots
+        slots = np.asarray(slots, dtype=np.int64)
+        return (self.generations[slots] << SLOT_BITS) | slots
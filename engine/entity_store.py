@@ -0,0 +1,205 @@
+from collections import deque
+
+import numpy as np
+
+# Entity Flags (bitmask stored per slot)
+FLAG_ALIVE = 1 << 0
+FLAG_COLLIDABLE = 1 << 1
+FLAG_MOVING = 1 << 2
+FLAG_IN_SCENE = 1 << 3 # Set while the owning object is in a SceneManager
+FLAG_BOUNDS_DIRTY = 1 << 4 # Position/scale/size changed since world_bounds was computed
+FLAG_MATRIX_DIRTY = 1 << 5 # Position/rotation/scale changed since model_matrices was computed
+FLAG_TRANSFORM_DIRTY = FLAG_BOUNDS_DIRTY | FLAG_MATRIX_DIRTY
+
+# Game Flags
+FLAG_PREY = 1 << 8
+FLAG_PREDATOR = 1 << 9
+FLAG_THREATENED = 1 << 10 # Prey with a predator inside its detection radius
+FLAG_HAS_MATE = 1 << 11 # Ready male with a ready female inside his repro range
+FLAG_MATE_READY = 1 << 12 # Hamster in MatingSystem's ready index (adult, cooldown over)
+FLAG_FEMALE = 1 << 13
+
+# Kinds: what an entity is (Object.kind). Stored in the upper flag bits, so a kind
+# also works as a query mask (e.g. SceneManager.query_radius(..., kind=KIND_CAT))
+KIND_FLOOR = 1 << 16
+KIND_HAMSTER = 1 << 17
+KIND_CAT = 1 << 18
+KIND_MASK = 0xFFFF0000
+
+
+class EntityStore:
+    """
+    Structure-of-arrays storage for per-entity data.
+
+    Every entity owns one slot, which is a row index into each field array
+    (positions, rotations, scales, directions, flags, ...). Arrays are contiguous
+    so systems can work on many entities at once with fancy indexing.
+    Arrays are reallocated when the store grows, so never keep a reference to a
+    field array across allocations; read it from the store instead.
+    """
+    def __init__(self, capacity=1024):
+        self.capacity = max(int(capacity), 1)
+        self.size = 0 # High-water mark of used slots
+        self.free_slots = []
+        self.pending_releases = deque() # Slots of collected transforms, see release_later()
+        self.fields = {} # name -> (width, dtype, fill)
+
+        self.add_field("positions", 3, np.float32, 0.0)
+        self.add_field("rotations", 3, np.float32, 0.0)
+        self.add_field("scales", 3, np.float32, 1.0)
+        self.add_field("directions", 2, np.float32, 0.0)
+        self.add_field("local_sizes", 2, np.float32, 1.0) # Mesh extents before scale
+        self.add_field("world_bounds", 4, np.float32, 0.0) # Cached min_x, min_y, max_x, max_y
+        self.add_field("radii", 0, np.float32, 0.0) # Cached center-to-corner radius
+        self.add_field("model_matrices", 16, np.float32, 0.0) # Cached 4x4 model matrix per slot, row-major
+        self.add_field("flags", 0, np.uint32, 0)
+
+    def add_field(self, name, width, dtype, fill=0):
+        """
+        Registers a per-entity array. width 0 means one scalar per slot.
+        """
+        if name in self.fields:
+            return getattr(self, name)
+
+        shape = (self.capacity, width) if width else (self.capacity,)
+        array = np.full(shape, fill, dtype=dtype)
+        self.fields[name] = (width, dtype, fill)
+        setattr(self, name, array)
+        return array
+
+    def _grow(self, min_capacity):
+        new_capacity = self.capacity
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+
+        for name, (width, dtype, fill) in self.fields.items():
+            old = getattr(self, name)
+            shape = (new_capacity, width) if width else (new_capacity,)
+            array = np.full(shape, fill, dtype=dtype)
+            array[:self.capacity] = old
+            setattr(self, name, array)
+
+        self.capacity = new_capacity
+
+    def allocate(self):
+        self.release_pending()
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.size
+            if slot >= self.capacity:
+                self._grow(slot + 1)
+            self.size += 1
+
+        # Reset row to defaults
+        for name, (width, dtype, fill) in self.fields.items():
+            getattr(self, name)[slot] = fill
+
+        self.flags[slot] = FLAG_ALIVE | FLAG_TRANSFORM_DIRTY
+        return slot
+
+    def release(self, slot):
+        self.flags[slot] = 0
+        self.free_slots.append(slot)
+
+    def release_later(self, slot):
+        # Safe from any thread (e.g. a garbage collection on the UI thread); the
+        # slot is freed by the owning thread in release_pending()
+        self.pending_releases.append(slot)
+
+    def release_pending(self):
+        pending = self.pending_releases
+        while pending:
+            self.release(pending.popleft())
+
+    def live_slots(self):
+        return np.flatnonzero(self.flags[:self.size] & FLAG_ALIVE)
+
+    def slots_with(self, flags):
+        # Slots that have every bit in flags set
+        return np.flatnonzero((self.flags[:self.size] & flags) == flags)
+
+    def set_flag(self, slot, flag, value):
+        if value:
+            self.flags[slot] |= flag
+        else:
+            self.flags[slot] &= ~np.uint32(flag)
+
+    def has_flag(self, slot, flag):
+        return bool(self.flags[slot] & flag)
+
+    def mark_dirty(self, slots, flags=FLAG_TRANSFORM_DIRTY):
+        # For batch writers that modify positions/scales directly
+        self.flags[slots] |= np.uint32(flags)
+
+    def refresh_bounds(self, slots=None):
+        """
+        Recomputes world_bounds and radii for dirty slots (all of them when slots
+        is None) and clears their dirty bit. Clean slots keep their cached values.
+        """
+        if slots is None:
+            slots = self.slots_with(FLAG_BOUNDS_DIRTY)
+        if not len(slots):
+            return
+
+        pos = self.positions[slots, :2]
+        half = self.local_sizes[slots] * self.scales[slots, :2] * 0.5
+        self.world_bounds[slots, :2] = pos - half
+        self.world_bounds[slots, 2:] = pos + half
+        self.radii[slots] = np.hypot(half[:, 0], half[:, 1])
+        self.flags[slots] &= ~np.uint32(FLAG_BOUNDS_DIRTY)
+
+
+class SlotField:
+    """
+    Descriptor exposing one EntityStore column of an instance's slot as a plain attribute.
+
+    The instance provides `_store` and `_slot`. While `_store` is None the value
+    is kept on the instance, and SlotField.bind() moves it into the store.
+    With `flag` set, the attribute is a bool backed by that bit of `flags`.
+    """
+    def __init__(self, field=None, flag=None, default=None):
+        self.field = field
+        self.flag = flag
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.local_name = "_local_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = obj._store
+        if store is None:
+            return obj.__dict__.get(self.local_name, self.default)
+        if self.flag is not None:
+            return bool(store.flags[obj._slot] & self.flag)
+        value = getattr(store, self.field)[obj._slot].tolist()
+        return tuple(value) if isinstance(value, list) else value
+
+    def __set__(self, obj, value):
+        store = obj._store
+        if store is None:
+            obj.__dict__[self.local_name] = value
+        elif self.flag is not None:
+            store.set_flag(obj._slot, self.flag, value)
+        else:
+            getattr(store, self.field)[obj._slot] = value
+
+    @staticmethod
+    def bind(obj, store, slot):
+        # Collect local values first so every field is written to the new slot
+        values = {}
+        for cls in reversed(type(obj).__mro__):
+            for name, attr in vars(cls).items():
+                if isinstance(attr, SlotField):
+                    values[name] = attr.__get__(obj)
+        obj._store = store
+        obj._slot = slot
+        for name, value in values.items():
+            if value is not None:
+                setattr(obj, name, value)
+
+
+# Shared store for transforms created outside of a scene (e.g. Camera)
+default_store = EntityStore(capacity=64)
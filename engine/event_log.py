@@ -0,0 +1,114 @@
+import queue
+import threading
+from collections import deque, namedtuple
+from logging import DEBUG, INFO, WARNING
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING"}
+
+# One log entry; `message` is a str.format template filled from `args` only when displayed
+LogRecord = namedtuple("LogRecord", "tick level category message args handles")
+
+
+def format_record(record):
+    return record.message.format(*record.args) if record.args else record.message
+
+
+class EventLog:
+    """
+    Bounded log of structured records: the oldest records are dropped once
+    `capacity` is reached. Records below `level` or outside `categories`
+    (None = all) are discarded before anything is built. Text is only produced
+    by lines()/format_record(), i.e. when something actually displays it.
+    """
+    def __init__(self, capacity=1024, level=INFO, categories=None):
+        self.records = deque(maxlen=capacity) # Ring buffer
+        self.level = level
+        self.categories = categories
+        self.tick = 0 # Advanced by SceneManager.tick
+        self.sinks = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def enabled(self, level, category):
+        return level >= self.level and (self.categories is None or category in self.categories)
+
+    def log(self, category, message, *args, level=INFO, handles=()):
+        if not self.enabled(level, category):
+            return
+        record = LogRecord(self.tick, level, category, message, args, handles)
+        self.records.append(record)
+        for sink in self.sinks:
+            sink.write(record)
+
+    def clear(self):
+        self.records.clear()
+
+    def query(self, level=DEBUG, categories=None, last=None):
+        # Newest `last` records at or above level (in order), optionally limited to categories
+        matches = [r for r in self.records
+                   if r.level >= level and (categories is None or r.category in categories)]
+        return matches[-last:] if last else matches
+
+    def lines(self, last=50, level=DEBUG, categories=None):
+        return [format_record(r) for r in self.query(level, categories, last)]
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.sinks.clear()
+
+
+class FileSink:
+    """
+    Appends records to a text file from a background thread. write() only
+    enqueues; the thread formats and writes whatever has accumulated in one
+    batch every `flush_interval` seconds, so the tick never waits on disk.
+    """
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.error = None # OSError that disabled the sink; records are dropped from then on
+        self.queue = queue.SimpleQueue()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="EventLogSink", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        if self.error is None:
+            self.queue.put(record)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                while True:
+                    stopping = self.closed.wait(self.flush_interval)
+                    batch = self._drain()
+                    if batch:
+                        f.write("".join(
+                            f"{r.tick}\t{LEVEL_NAMES.get(r.level, r.level)}\t{r.category}\t{format_record(r)}\n"
+                            for r in batch))
+                        f.flush()
+                    if stopping:
+                        return
+        except OSError as e:
+            # Stop accepting records and free what was queued
+            self.error = e
+            self._drain()
+            print(f"Event log sink disabled: {e}")
+
+    def close(self):
+        # Writes out everything queued so far, then stops the thread
+        self.closed.set()
+        self.thread.join()
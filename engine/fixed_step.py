@@ -0,0 +1,55 @@
+CATCH_UP_POLICIES = ("drop", "carry")
+
+
+class FixedStepClock:
+    """
+    Turns variable frame times into a whole number of fixed simulation steps.
+
+    advance() adds elapsed (already time-scaled) seconds to an accumulator and
+    returns how many `step`-sized ticks to run, at most `max_substeps`. When a
+    frame owes more than that, "drop" discards the excess (the sim runs slower
+    than real time for that frame) and "carry" keeps it, bounded by `max_lag`
+    seconds, to be caught up on later frames. `alpha` is how far the leftover
+    time reaches into the next step, for interpolating rendered transforms.
+    """
+    def __init__(self, tick_rate=60.0, max_substeps=10, catch_up="drop", max_lag=0.25):
+        self.max_lag = max_lag
+        self.accumulator = 0.0
+        self.configure(tick_rate, max_substeps, catch_up)
+
+    def configure(self, tick_rate, max_substeps, catch_up):
+        # Takes effect from the next advance(); the accumulated time is kept
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy '{catch_up}', expected one of {CATCH_UP_POLICIES}")
+        if tick_rate <= 0 or max_substeps < 1:
+            raise ValueError("tick_rate must be positive and max_substeps at least 1")
+        self.step = 1.0 / tick_rate
+        self.max_substeps = max_substeps
+        self.catch_up = catch_up
+
+    def matches(self, tick_rate, max_substeps, catch_up):
+        return (self.step == 1.0 / tick_rate and self.max_substeps == max_substeps
+                and self.catch_up == catch_up)
+
+    @property
+    def tick_rate(self):
+        return 1.0 / self.step
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.step, 1.0)
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        self.accumulator += max(elapsed, 0.0)
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_substeps:
+            steps = self.max_substeps
+            if self.catch_up == "drop":
+                self.accumulator = steps * self.step
+            else:
+                self.accumulator = min(self.accumulator, steps * self.step + self.max_lag)
+        self.accumulator -= steps * self.step
+        return steps
@@ -0,0 +1,122 @@
+"""
+Headless simulation runner.
+
+Builds a World without any GL resources and drives World.tick in a tight loop,
+reporting raw simulation throughput instead of the GLUT-bound frame rate.
+
+    python -m engine.headless --hamsters 10000 --cats 50 --ticks 5000 --dt 0.016
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from engine.auto_broadphase import BROADPHASE_MODES
+from engine.world import World
+from engine.event_log import FileSink
+from engine.entity_store import KIND_CAT, KIND_HAMSTER
+from game_objects.components.ai_component import HamsterAIComponent
+
+
+def build_world(hamsters, cats, field_size, seed=None, broadphase="auto", shards=0):
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    world = World(0, 0)
+    # No load_assets(): objects are created without mesh/material,
+    # which the sim never touches.
+    world.setting.field_size = field_size
+    world.setting.hamster_count = hamsters
+    world.setting.cat_count = cats
+    world.setting.broadphase = broadphase
+    world.scene_manager.set_broadphase(broadphase)
+    if shards:
+        world.set_shards(shards)
+    world.reset()
+    world.scene_manager.is_paused = False
+    return world
+
+
+def count_population(scene_manager):
+    cats = scene_manager.count_of(KIND_CAT)
+    adults = 0
+    babies = 0
+    for obj in scene_manager.objects_of(KIND_HAMSTER):
+        if obj.get_component(HamsterAIComponent).is_adult:
+            adults += 1
+        else:
+            babies += 1
+    return cats, adults, babies
+
+
+def run(world, ticks, dt):
+    # Returns per-tick wall time in seconds
+    durations = np.empty(ticks, dtype=np.float64)
+    clock = time.perf_counter
+    for i in range(ticks):
+        start = clock()
+        world.tick(dt)
+        durations[i] = clock() - start
+    return durations
+
+
+def report(durations, dt, time_scale, population):
+    total = float(durations.sum())
+    ticks = len(durations)
+    p50, p90, p99 = np.percentile(durations, [50, 90, 99]) * 1000.0
+    cats, adults, babies = population
+
+    print(f"Ticks:        {ticks}")
+    print(f"Wall time:    {total:.3f} s")
+    print(f"Sim time:     {ticks * dt * time_scale:.3f} s")
+    print(f"Ticks/sec:    {ticks / total if total > 0 else float('inf'):.1f}")
+    print(f"Tick latency: p50 {p50:.3f} ms | p90 {p90:.3f} ms | p99 {p99:.3f} ms | max {durations.max() * 1000.0:.3f} ms")
+    print(f"Population:   Cats {cats} | Adult Hamsters {adults} | Baby Hamsters {babies}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the simulation without rendering and report throughput.")
+    parser.add_argument("--hamsters", type=int, default=15, help="Initial hamster count")
+    parser.add_argument("--cats", type=int, default=1, help="Initial cat count")
+    parser.add_argument("--ticks", type=int, default=1000, help="Number of ticks to run")
+    parser.add_argument("--dt", type=float, default=0.016, help="Seconds per tick (before time scale)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="World time scale")
+    parser.add_argument("--field", type=float, nargs=2, default=(10.0, 10.0), metavar=("W", "H"), help="Field size")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--broadphase", choices=BROADPHASE_MODES, default="auto", help="Collision broadphase backend")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Worker processes for spatial queries (0 = in process); "
+                             "with --broadphase sharded collision pairs are sharded too")
+    parser.add_argument("--log-file", default=None, help="Append simulation log records to this file")
+    args = parser.parse_args(argv)
+    if args.ticks < 1:
+        parser.error("--ticks must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    build_start = time.perf_counter()
+    world = build_world(args.hamsters, args.cats, tuple(args.field), args.seed, args.broadphase, args.shards)
+    world.setting.time_scale = args.time_scale
+    if args.log_file:
+        world.scene_manager.logs.add_sink(FileSink(args.log_file))
+    print(f"World built in {time.perf_counter() - build_start:.3f} s "
+          f"({args.hamsters} hamsters, {args.cats} cats, field {args.field[0]}x{args.field[1]})")
+
+    try:
+        durations = run(world, args.ticks, args.dt)
+    finally:
+        world.scene_manager.logs.close()
+        if world.shards:
+            world.shards.close()
+    report(durations, args.dt, args.time_scale, count_population(world.scene_manager))
+    broadphase = world.scene_manager.broadphase
+    print(f"Broadphase:   {getattr(broadphase, 'active_name', None) or broadphase.name}")
+
+
+if __name__ == "__main__":
+    main()
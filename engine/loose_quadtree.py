@@ -0,0 +1,86 @@
+import numpy as np
+from engine.array_utils import ordered_pairs
+from engine.broadphase import Broadphase
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
+from engine.spatial_grid import SpatialGrid
+
+class LooseQuadtree(Broadphase):
+    """
+    Loose quadtree stored level by level.
+
+    Level l has square cells of base_size * 2**l, so every cell splits exactly into
+    four cells of the level below. An entity lives in the finest level whose cell
+    is at least its diameter, binned by center; the loose bound (cell grown by half
+    a cell on each side) always contains it. Each level is a SpatialGrid (CSR) that
+    pads queries by its own largest member, so small entities are never searched
+    with the padding of the biggest one.
+    """
+    name = "quadtree"
+    max_levels = 8
+
+    def __init__(self, store, base_size=None, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        super().__init__(store, required_flags)
+        self.fixed_base_size = base_size
+        self.clear()
+
+    def clear(self):
+        self.base_size = self.fixed_base_size
+        self.levels = []
+        self.extent = None
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
+
+    def search_radius(self):
+        return self.base_size or 1.0
+
+    def update(self, members=None):
+        if members is None:
+            members = self.member_slots()
+        self.set_extent(members)
+        if not len(members):
+            for level in self.levels:
+                level.update(members)
+            return
+
+        diameters = self.half_extents(members).max(axis=1) * 2.0
+        if self.base_size is None:
+            # Chosen once from the smallest entity; levels above cover larger ones
+            self.base_size = max(float(diameters.min()), 1e-3)
+
+        ratio = np.maximum(diameters / self.base_size, 1.0)
+        depth = np.ceil(np.log2(ratio) - 1e-9).astype(np.intp)
+        depth = np.minimum(depth, self.max_levels - 1)
+
+        needed = int(depth.max()) + 1
+        while len(self.levels) < needed:
+            cell_size = self.base_size * (2 ** len(self.levels))
+            self.levels.append(SpatialGrid(self.store, cell_size=cell_size, required_flags=self.required_flags))
+
+        for l, level in enumerate(self.levels):
+            level.update(members[depth == l])
+
+    def query_aabb(self, min_x, min_y, max_x, max_y):
+        found = [level.query_aabb(min_x, min_y, max_x, max_y) for level in self.levels if len(level)]
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(found)
+
+    def candidate_pairs(self):
+        # Pairs inside each level, then each level's members against every coarser level
+        levels = [level for level in self.levels if len(level)]
+        pairs_a = []
+        pairs_b = []
+        for i, level in enumerate(levels):
+            a, b = level.candidate_pairs()
+            pairs_a.append(a)
+            pairs_b.append(b)
+            for coarser in levels[i + 1:]:
+                a, b = coarser.pairs_with(level.index, level.max_half)
+                pairs_a.append(a)
+                pairs_b.append(b)
+
+        if not pairs_a:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        return ordered_pairs(np.concatenate(pairs_a), np.concatenate(pairs_b))
@@ -1,32 +1,31 @@
 from OpenGL.GL import *
-from PIL import Image
-from utils.shader_loader import load_shader_from_file
+from engine.resource_manager import ResourceManager
 
 class Material:
-    def __init__(self, vertex_path, fragment_path, texture_path=None):
-        self.program_id = load_shader_from_file(vertex_path, fragment_path)
+    def __init__(self, vertex_path, fragment_path, texture_path=None, resources=None):
+        # Pass a shared ResourceManager so materials reuse programs and textures
+        self.resources = resources if resources is not None else ResourceManager()
+        self.program_id = self.resources.load_program(vertex_path, fragment_path)
         self.texture_id = None
+        self.uv_rect = (0.0, 0.0, 1.0, 1.0) # Region of the texture to sample: u, v, width, height
         if texture_path:
             self.load_texture(texture_path)
 
     def load_texture(self, path):
-        img = Image.open(path)
-        img = img.transpose(Image.FLIP_TOP_BOTTOM)
-        img_data = img.convert("RGBA").tobytes()
-        
-        self.texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.texture_id)
-        
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, img.width, img.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-        
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        self.texture_id = self.resources.load_texture(path)
+        self.uv_rect = (0.0, 0.0, 1.0, 1.0)
+
+    def use_sprite(self, name):
+        # Sample one sprite of the resource manager's atlas
+        self.texture_id = self.resources.atlas_texture
+        self.uv_rect = self.resources.atlas_rects[name]
+
+    def uniform_location(self, name):
+        return self.resources.uniform_location(self.program_id, name)
 
     def use(self):
         glUseProgram(self.program_id)
         if self.texture_id:
             glActiveTexture(GL_TEXTURE0)
             glBindTexture(GL_TEXTURE_2D, self.texture_id)
-            glUniform1i(glGetUniformLocation(self.program_id, "ourTexture"), 0)
+            glUniform1i(self.uniform_location("ourTexture"), 0)
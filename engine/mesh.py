@@ -1,12 +1,18 @@
 from OpenGL.GL import *
 import numpy as np
 
+# Per-instance vertex data: model matrix rows (16 floats), UV scale (2 floats), UV rect (4 floats)
+INSTANCE_FLOATS = 22
+INSTANCE_LOCATION = 2 # First attribute location, see assets/shaders/instanced.vert
+
 class Mesh:
     def __init__(self, vertices, indices, min_point=None, max_point=None):
         self.vao = glGenVertexArrays(1)
         self.vbo = glGenBuffers(1)
         self.ebo = glGenBuffers(1)
         self.indices_count = len(indices)
+        self.instance_vbo = None # Created on first draw_instanced()
+        self.instance_capacity = 0 # Bytes allocated in instance_vbo
         
         # Bounding Box
         self.min_point = min_point if min_point else (-0.5, -0.5, 0)
@@ -33,9 +39,49 @@ class Mesh:
         glBindBuffer(GL_ARRAY_BUFFER, 0) 
         glBindVertexArray(0)
 
-    def draw(self):
+    def _setup_instance_buffer(self):
+        self.instance_vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+
+        stride = INSTANCE_FLOATS * 4
+        # Model matrix rows, one vec4 attribute each
+        for row in range(4):
+            location = INSTANCE_LOCATION + row
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(row * 16))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+
+        # UV Scale, UV Rect
+        for location, size, offset in ((INSTANCE_LOCATION + 4, 2, 64), (INSTANCE_LOCATION + 5, 4, 72)):
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def draw_instanced(self, instances):
+        """
+        Draws the mesh once per row of instances, a float32 (N, INSTANCE_FLOATS) array,
+        with a single draw call.
+        """
+        count = len(instances)
+        if not count:
+            return
+        if self.instance_vbo is None:
+            self._setup_instance_buffer()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        if instances.nbytes > self.instance_capacity:
+            # Grow geometrically so a growing population rarely reallocates
+            self.instance_capacity = max(instances.nbytes, self.instance_capacity * 2)
+            glBufferData(GL_ARRAY_BUFFER, self.instance_capacity, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, instances.nbytes, instances)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
         glBindVertexArray(self.vao)
-        glDrawElements(GL_TRIANGLES, self.indices_count, GL_UNSIGNED_INT, None)
+        glDrawElementsInstanced(GL_TRIANGLES, self.indices_count, GL_UNSIGNED_INT, None, count)
         glBindVertexArray(0)
 
     @staticmethod
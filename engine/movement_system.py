@@ -0,0 +1,93 @@
+import numpy as np
+from engine.component import ComponentSystem
+from engine.entity_store import FLAG_MOVING
+
+class MovementSystem(ComponentSystem):
+    """
+    Batched wander movement for AI agents.
+
+    Agents submit themselves from their tick(); MovementSystem.tick() then runs the
+    state timers, moving/resting flips, new headings, integration and field wall
+    bounce for every submitted agent with a few array operations.
+    Mirrors BaseAIComponent's per-object tick/move/check_boundary.
+    Register it after SceneManager.component_system.
+    """
+    component_type = None # Agents submit themselves
+    def __init__(self, store, setting):
+        self.store = store
+        self.setting = setting
+        self.pending = []
+        self.steering = [] # Indices into pending for agents with steers = True
+        self.register_fields(store)
+
+    @staticmethod
+    def register_fields(store):
+        store.add_field("state_timers", 0, np.float32, 0.0)
+        store.add_field("move_speeds", 0, np.float32, 1.0)
+        store.add_field("move_durations", 0, np.float32, 2.0)
+        store.add_field("rest_durations", 0, np.float32, 2.0)
+
+    def submit(self, agent):
+        if agent.steers:
+            self.steering.append(len(self.pending))
+        self.pending.append(agent)
+
+    def clear(self):
+        self.pending = []
+        self.steering = []
+
+    def tick(self, components, dt):
+        agents = self.pending
+        steering = self.steering
+        self.clear()
+        if not agents:
+            return
+
+        store = self.store
+        slots = np.fromiter((a._slot for a in agents), dtype=np.intp, count=len(agents))
+
+        # 1. State Timers / Transition
+        timers = store.state_timers[slots] - dt
+        flags = store.flags[slots]
+        expired = timers <= 0
+        moving = ((flags & FLAG_MOVING) != 0) ^ expired
+
+        start_move = expired & moving
+        start_rest = expired & ~moving
+        timers[start_move] = store.move_durations[slots[start_move]]
+        timers[start_rest] = store.rest_durations[slots[start_rest]]
+        store.state_timers[slots] = timers
+
+        flags = np.where(moving, flags | FLAG_MOVING, flags & ~np.uint32(FLAG_MOVING))
+        store.flags[slots] = flags
+
+        new_heading = slots[start_move]
+        if len(new_heading):
+            angles = np.random.uniform(0, 6.28318, len(new_heading))
+            store.directions[new_heading, 0] = np.cos(angles)
+            store.directions[new_heading, 1] = np.sin(angles)
+
+        # 2. Steering (e.g. chase) for agents that are moving this tick
+        for i in steering:
+            if moving[i]:
+                agents[i].steer()
+
+        # 3. Integrate + Boundary Bounce
+        movers = slots[moving]
+        if not len(movers):
+            return
+
+        old = store.positions[movers, :2]
+        directions = store.directions[movers]
+        step = (store.move_speeds[movers] * dt)[:, None]
+        half = store.local_sizes[movers] * store.scales[movers, :2] * 0.5
+        half_field = np.asarray(self.setting.field_size, dtype=np.float32) * 0.5
+
+        new = old + directions * step
+        out = (new - half < -half_field) | (new + half > half_field)
+
+        # Reflect the offending axis and re-step from the old position
+        directions = np.where(out, -directions, directions)
+        store.directions[movers] = directions
+        store.positions[movers, :2] = old + directions * step
+        store.mark_dirty(movers)
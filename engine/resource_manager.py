@@ -0,0 +1,103 @@
+import hashlib
+from OpenGL.GL import *
+from PIL import Image
+from utils.shader_loader import load_shader_source, load_shader
+
+def pack_rects(sizes, max_width=2048, padding=2):
+    """
+    Shelf packing, tallest first. sizes is a list of (width, height).
+    Returns (positions, (atlas_width, atlas_height)) with positions in input order.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    used_width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x > 0 and x + w > max_width:
+            # Start a new shelf
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[i] = (x, y)
+        x += w + padding
+        used_width = max(used_width, x - padding)
+        shelf_height = max(shelf_height, h)
+
+    return positions, (used_width, y + shelf_height)
+
+
+class ResourceManager:
+    """
+    Shared GL resources for materials.
+
+    - Shader programs are deduplicated by the hash of their sources, so materials
+      using the same shader files share one program.
+    - Uniform locations are cached per (program, name).
+    - Textures are cached per path.
+    - Sprite textures can be packed into one atlas; each sprite gets a UV rect
+      (u, v, width, height) into it, so sprites share one texture binding.
+    """
+    def __init__(self):
+        self.programs = {} # source hash -> program id
+        self.uniform_locations = {} # (program, name) -> location
+        self.textures = {} # path -> texture id
+        self.atlas_texture = None
+        self.atlas_rects = {} # sprite name -> (u, v, width, height)
+
+    def load_program(self, vertex_path, fragment_path):
+        vertex_src = load_shader_source(vertex_path)
+        fragment_src = load_shader_source(fragment_path)
+        key = hashlib.sha1((vertex_src + "\0" + fragment_src).encode("utf-8")).hexdigest()
+
+        program = self.programs.get(key)
+        if program is None:
+            program = self.programs[key] = load_shader(vertex_src, fragment_src)
+        return program
+
+    def uniform_location(self, program, name):
+        key = (program, name)
+        location = self.uniform_locations.get(key)
+        if location is None:
+            location = self.uniform_locations[key] = glGetUniformLocation(program, name)
+        return location
+
+    def _upload(self, img, wrap):
+        texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, img.width, img.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img.tobytes())
+
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        return texture_id
+
+    def load_texture(self, path):
+        # Standalone texture with GL_REPEAT, for tiled surfaces (uv_scale > 1)
+        texture_id = self.textures.get(path)
+        if texture_id is None:
+            img = Image.open(path).transpose(Image.FLIP_TOP_BOTTOM).convert("RGBA")
+            texture_id = self.textures[path] = self._upload(img, GL_REPEAT)
+        return texture_id
+
+    def build_atlas(self, sprites, max_width=2048, padding=2):
+        """
+        Packs sprite images ({name: path}) into one texture and fills atlas_rects.
+        UV rects are in the flipped (GL) image space, matching load_texture.
+        """
+        images = {name: Image.open(path).convert("RGBA") for name, path in sprites.items()}
+        names = list(images)
+        positions, (width, height) = pack_rects([images[n].size for n in names], max_width, padding)
+
+        atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        for name, (x, y) in zip(names, positions):
+            atlas.paste(images[name], (x, y))
+
+        self.atlas_rects = {}
+        for name, (x, y) in zip(names, positions):
+            w, h = images[name].size
+            # Flipping the atlas vertically moves the sprite's top row from y to height - y
+            self.atlas_rects[name] = (x / width, (height - y - h) / height, w / width, h / height)
+
+        self.atlas_texture = self._upload(atlas.transpose(Image.FLIP_TOP_BOTTOM), GL_CLAMP_TO_EDGE)
+        return self.atlas_rects
@@ -1,144 +1,406 @@
-from engine.spatial_grid import SpatialGrid
+import numpy as np
+from engine.auto_broadphase import create_broadphase
+from engine.entity_registry import EntityRegistry
+from engine.component import ComponentSystem
+from engine.entity_store import EntityStore, FLAG_IN_SCENE, KIND_MASK
+from engine.event_log import EventLog
+from engine.collision_events import CollisionBuffer, CollisionBatch, EVENT_COLLISION
+from engine.transform import update_model_matrices
+from engine.mesh import INSTANCE_FLOATS
+
+def kind_bits(kind):
+    # Single bits set in a kind mask, lowest first
+    while kind:
+        bit = kind & -kind
+        yield bit
+        kind ^= bit
+
 
 class SceneManager:
-    def __init__(self):
-        self.objects = []
-        self.grid = SpatialGrid(cell_size=0.2) 
-        self.events = []
-        self.logs = []
+    def __init__(self, broadphase="auto", shards=None):
+        self.store = EntityStore() # Per-entity arrays (Transform rows live here)
+        self.registry = EntityRegistry() # Generational handles, O(1) add/remove
+        self.objects = self.registry.objects # Dense, swap-removed (order changes on removal)
+        self.component_index = {} # Exact component class -> {component: None}, for objects in the scene
+        self.component_system = ComponentSystem() # Ticks every component
+        self.systems = [self.component_system] # ComponentSystems in run order (see register_system)
+        self.system_types = {ComponentSystem: self.component_system} # System class -> instance
+        self._type_cache = {} # components_of() class lists, reset when classes change
+        self.slot_objects = self.registry.by_slot # EntityStore slot -> Object, for objects in the scene
+        self.kind_objects = {} # KIND_* bit -> {slot: Object}, insertion ordered
+        self.render_groups = [] # (mesh, material) per render group id, in first-seen order
+        self._render_group_ids = {} # (mesh, program, texture) -> render group id
+        self.store.add_field("render_groups", 0, np.int32, -1) # Render group id per slot, -1 = not drawn
+        self.store.add_field("uv_params", 6, np.float32, 0.0) # Per slot: uv_scale (2), material uv_rect (4)
+        self.shards = shards # Optional ShardPool for the "sharded" broadphase
+        self.broadphase = create_broadphase(broadphase, self.store, shards) # Collision + spatial query index
+        self.collisions = CollisionBuffer() # This tick's overlapping pairs (reused every tick)
+        self.subscriptions = {EVENT_COLLISION: []} # Event type -> [(kind_a, kind_b, handler)]
+        self.logs = EventLog() # Bounded structured records, formatted only when shown
+        self.stats = {} # Population counters/aggregates, kept current by components via add_stat()
+        self.deferring = False # True during tick(): add/remove_object are queued (see apply_commands)
+        self.pending_adds = []
+        self.pending_removes = {} # slot -> Object
         self.is_paused = True # Default Paused
+        self.previous_positions = None # Positions before the latest tick, for render interpolation
+        self.previous_handles = None # Handle per slot at that point (-1 = not in scene)
         self.aabb_checks = 0
         self.potential_checks = 0
 
     def add_object(self, obj):
-        self.objects.append(obj)
+        # Inside tick() the add is queued until the end-of-tick sync point
+        if self.deferring:
+            self.pending_adds.append(obj)
+            return
+        self._add_objects([obj])
+
+    def remove_object(self, obj):
+        # Inside tick() the removal is queued; the object stays live (and iterable) until then
+        if self.deferring:
+            if obj in self.registry:
+                self.pending_removes[obj.transform.slot] = obj
+            elif obj in self.pending_adds:
+                self.pending_adds.remove(obj)
+            return
+        self._remove_objects([obj])
+
+    def apply_commands(self):
+        """
+        Sync point for structural changes queued during tick(): applies all
+        removals, then all additions, as two batches.
+        """
+        self.store.release_pending()
+        removes = list(self.pending_removes.values())
+        adds = self.pending_adds
+        self.pending_removes = {}
+        self.pending_adds = []
+        if removes:
+            self._remove_objects(removes)
+        if adds:
+            self._add_objects(adds)
+
+    def _add_objects(self, objs):
+        index = self.component_index
+        for obj in objs:
+            self.registry.add(obj)
+            for bit in kind_bits(obj.kind):
+                self.kind_objects.setdefault(bit, {})[obj.transform.slot] = obj
+            self._index_render(obj)
+            for component in obj.components:
+                members = index.get(type(component))
+                if members is None:
+                    members = index[type(component)] = {}
+                    self._type_cache.clear()
+                members[component] = None
+
+        slots = [obj.transform.slot for obj in objs]
+        self.store.flags[slots] |= np.uint32(FLAG_IN_SCENE)
+        for obj in objs:
+            obj.on_added()
+
+    def _index_render(self, obj):
+        # Render group and UV data go to store columns, so get_render_queue never walks
+        # objects; mesh, material and uv_scale are read here (set them before adding)
+        store = self.store
+        slot = obj.transform.slot
+        material = obj.material
+        if not obj.mesh or not material:
+            store.render_groups[slot] = -1
+            return
+        key = (obj.mesh, material.program_id, material.texture_id)
+        group = self._render_group_ids.get(key)
+        if group is None:
+            group = self._render_group_ids[key] = len(self.render_groups)
+            self.render_groups.append((obj.mesh, material))
+        store.render_groups[slot] = group
+        store.uv_params[slot, :2] = obj.uv_scale
+        store.uv_params[slot, 2:] = material.uv_rect
+
+    def _remove_objects(self, objs):
+        removed = [obj for obj in objs if self.registry.remove(obj)]
+        for obj in removed:
+            for bit in kind_bits(obj.kind):
+                del self.kind_objects[bit][obj.transform.slot]
+            for component in obj.components:
+                del self.component_index[type(component)][component]
+
+        slots = [obj.transform.slot for obj in removed]
+        self.store.flags[slots] &= ~np.uint32(FLAG_IN_SCENE)
+        for obj in removed:
+            obj.on_removed()
+
+    def resolve(self, handle):
+        # Object for a handle, or None once it has left the scene
+        return self.registry.get(handle)
+
+    def objects_of(self, kind):
+        # Objects in the scene with every bit of kind, in the order they were added
+        bits = list(kind_bits(kind))
+        if not bits:
+            return []
+        groups = [self.kind_objects.get(bit, {}) for bit in bits]
+        smallest = min(groups, key=len)
+        if len(bits) == 1:
+            return list(smallest.values())
+        return [obj for obj in smallest.values() if obj.kind & kind == kind]
+
+    def count_of(self, kind):
+        # Number of objects having a single KIND_* bit
+        return len(self.kind_objects.get(kind, ()))
+
+    def components_of(self, component_type):
+        # In-scene components that are instances of component_type, grouped by exact class
+        key = ("subclasses", component_type)
+        classes = self._type_cache.get(key)
+        if classes is None:
+            classes = self._type_cache[key] = [cls for cls in self.component_index if issubclass(cls, component_type)]
+        return [c for cls in classes for c in self.component_index[cls]]
+
+    def register_system(self, system, before=None):
+        """
+        Adds a ComponentSystem to the tick, after the existing ones or right
+        before the system `before` (e.g. component_system for batched queries
+        that component ticks read).
+        """
+        index = self.systems.index(before) if before is not None else len(self.systems)
+        self.systems.insert(index, system)
+        self.system_types[type(system)] = system
+
+    def system(self, system_type):
+        # Registered system of that exact class, or None
+        return self.system_types.get(system_type)
+
+    def add_stat(self, name, delta):
+        self.stats[name] = self.stats.get(name, 0) + delta
+
+    def stat(self, name):
+        return self.stats.get(name, 0)
 
     def tick(self, dt):
         if self.is_paused:
             return
+        self.logs.tick += 1
 
-        # Synchronous Tick
-        for obj in self.objects:
-            obj.tick(dt)
-        
-        # Collision Detection (Spatial Grid)
-        self.check_collisions()
-        
-        # Process Events
-        self.process_events()
-
-    def remove_object(self, obj):
-        if obj in self.objects:
-            self.objects.remove(obj)
+        # Spawns/despawns are queued while the tick runs, so objects can be iterated safely
+        self.deferring = True
+        try:
+            # Systems: batched queries, component ticks, batched movement, ...
+            for system in self.systems:
+                component_type = system.component_type
+                system.tick(self.components_of(component_type) if component_type else [], dt)
+            
+            # Collision Detection (Broadphase)
+            self.check_collisions()
             
+            # Process Events
+            self.process_events()
+        finally:
+            self.deferring = False
+
+        # Sync Point: apply queued spawns/despawns
+        self.apply_commands()
+
     def clear(self):
-        self.objects.clear()
-        self.events.clear()
+        for obj in self.objects:
+            self.store.set_flag(obj.transform.slot, FLAG_IN_SCENE, False)
+        self.registry.clear()
+        self.kind_objects.clear()
+        self.component_index.clear()
+        self._type_cache.clear()
+        self.pending_adds = []
+        self.pending_removes = {}
+        self.stats.clear()
+        self.previous_positions = None
+        self.previous_handles = None
+        self.broadphase.clear()
+        self.collisions.clear()
+        for system in self.systems:
+            system.clear()
         self.logs.clear()
-        self.logs.append("World Reset")
+        self.logs.log("world", "World Reset")
         self.is_paused = True
 
+    def set_broadphase(self, mode):
+        self.broadphase = create_broadphase(mode, self.store, self.shards)
+        self.rebuild_broadphase()
+
+    def rebuild_broadphase(self):
+        # Backends update incrementally where they can (e.g. grid re-bins moved slots only)
+        self.broadphase.update()
+
+    # Spatial Queries
+    # Backed by the broadphase, so they see collidable objects as of the last
+    # update (end of the previous tick). Objects removed since then are skipped.
+    # kind is an EntityStore flag mask (e.g. FLAG_PREY); every bit must be set.
+
+    def _filter(self, slots, kind):
+        required = FLAG_IN_SCENE | (kind or 0)
+        return slots[(self.store.flags[slots] & required) == required]
+
+    def query_aabb(self, min_x, min_y, max_x, max_y, kind=None):
+        store = self.store
+        slots = self._filter(self.broadphase.query_aabb(min_x, min_y, max_x, max_y), kind)
+        store.refresh_bounds()
+        bounds = store.world_bounds[slots]
+        lo = bounds[:, :2]
+        hi = bounds[:, 2:]
+        hit = (lo[:, 0] <= max_x) & (hi[:, 0] >= min_x) & (lo[:, 1] <= max_y) & (hi[:, 1] >= min_y)
+        return [self.slot_objects[slot] for slot in slots[hit].tolist()]
+
+    def query_radius(self, x, y, radius, kind=None):
+        # Objects whose center lies within radius of (x, y)
+        slots = self._filter(self.broadphase.query_aabb(x - radius, y - radius, x + radius, y + radius), kind)
+        delta = self.store.positions[slots, :2] - (x, y)
+        hit = np.einsum("ij,ij->i", delta, delta) <= radius * radius
+        return [self.slot_objects[slot] for slot in slots[hit].tolist()]
+
+    def nearest(self, x, y, k=1, kind=None, max_dist=None):
+        # Up to k objects sorted by center distance
+        slots, _ = self.broadphase.nearest(x, y, k, max_dist, required_flags=FLAG_IN_SCENE | (kind or 0))
+        return [self.slot_objects[slot] for slot in slots.tolist()]
+
     def check_collisions(self):
-        # 1. Rebuild Grid
-        self.grid.clear()
-        for obj in self.objects:
-            if obj.enable_collision_event:
-               self.grid.insert(obj)
-        
-        # 2. Check Collisions
-        checked_pairs = set()
-        
-        # Reset Stats
+        # 1. Update Broadphase
+        self.rebuild_broadphase()
+
+        # 2. Candidate pairs as slot arrays (a < b, each pair once)
+        a, b = self.broadphase.candidate_pairs()
+        self.potential_checks = len(a)
         self.aabb_checks = 0
-        self.potential_checks = 0
-        
-        for obj_a in self.objects:
-            if not obj_a.enable_collision_event:
-                continue
-            
-            # Get nearby candidates
-            candidates = self.grid.retrieve(obj_a)
-            
-            for obj_b in candidates:
-                if obj_a == obj_b:
-                    continue
-                
-                # Check duplicate pairs (a,b) vs (b,a)
-                # Sort by id to ensure unique key
-                if id(obj_a) < id(obj_b):
-                    pair = (id(obj_a), id(obj_b))
-                else:
-                    pair = (id(obj_b), id(obj_a))
-                
-                if pair in checked_pairs:
-                    continue
-                
-                checked_pairs.add(pair)
-                
-                if not obj_b.enable_collision_event:
-                    continue
-                
-                self.potential_checks += 1
-                
-                # Check Sphere then AABB
-                if self.check_aabb(obj_a, obj_b):
-                    self.events.append({"type": "collision", "obj1": obj_a, "obj2": obj_b})
-
-    def check_aabb(self, a, b):
-        # Sphere Check Optimization
-        dx = a.transform.position.X() - b.transform.position.X()
-        dy = a.transform.position.Y() - b.transform.position.Y()
-        dist_sq = dx*dx + dy*dy
-        
-        rad_sum = a.get_world_radius() + b.get_world_radius()
-        if dist_sq > rad_sum * rad_sum:
-            return False
-
-        # Actual AABB Check start
-        self.aabb_checks += 1
-
-        # AABB Check
-        min_a = a.get_world_bounds()[:2]
-        max_a = a.get_world_bounds()[2:]
-
-        if min_a[0] > max_a[0] or min_a[1] > max_a[1]:
-            return False
-        
-        bounds_a = a.get_world_bounds()
-        bounds_b = b.get_world_bounds()
-        
-        if (bounds_a[0] < bounds_b[2] and bounds_a[2] > bounds_b[0] and
-            bounds_a[1] < bounds_b[3] and bounds_a[3] > bounds_b[1]):
-            return True
-        return False
+        if not len(a):
+            return
+
+        # 3. Narrowphase over all pairs at once: sphere test, then AABB
+        store = self.store
+        store.refresh_bounds()
+        pos = store.positions[:, :2]
+
+        delta = pos[a] - pos[b]
+        dist_sq = np.einsum("ij,ij->i", delta, delta)
+        rad_sum = store.radii[a] + store.radii[b]
+        near = dist_sq <= rad_sum * rad_sum
+        self.aabb_checks = int(np.count_nonzero(near))
+
+        # Strict overlap on both axes; inverted bounds never collide
+        a = a[near]
+        b = b[near]
+        bounds_a = store.world_bounds[a]
+        bounds_b = store.world_bounds[b]
+        hit = ((bounds_a[:, 0] < bounds_b[:, 2]) & (bounds_a[:, 2] > bounds_b[:, 0]) &
+               (bounds_a[:, 1] < bounds_b[:, 3]) & (bounds_a[:, 3] > bounds_b[:, 1]) &
+               (bounds_a[:, 0] <= bounds_a[:, 2]) & (bounds_a[:, 1] <= bounds_a[:, 3]))
+
+        # Pairs hold handles, so objects removed by an earlier handler are skipped
+        a = a[hit]
+        b = b[hit]
+        self.collisions.extend(a, b, self.registry.handles(a), self.registry.handles(b))
+
+    def subscribe(self, event_type, handler, kind_a=0, kind_b=0):
+        """
+        Calls handler(batch) once per tick with every event of event_type whose
+        entities match the kinds (0 matches any kind). For EVENT_COLLISION the
+        batch is a CollisionBatch oriented so side a has kind_a and side b kind_b.
+        Collision pairs claimed by no subscription fall back to Object.on_collision.
+        """
+        self.subscriptions[event_type].append((kind_a, kind_b, handler))
+
+    def unsubscribe(self, event_type, handler):
+        self.subscriptions[event_type] = [s for s in self.subscriptions[event_type] if s[2] is not handler]
 
     def process_events(self):
-        # Synchronous event processing
-        current_events = list(self.events)
-        self.events.clear()
-            
-        for event in current_events:
-            if event["type"] == "collision":
-                obj1 = event["obj1"]
-                obj2 = event["obj2"]
-                
-                # Delegate Collision Logic
+        buffer = self.collisions
+        if not buffer.count:
+            return
+        a, b, handles_a, handles_b = (array.copy() for array in buffer.views())
+        buffer.clear()
+
+        kinds = self.store.flags & np.uint32(KIND_MASK)
+        kinds_a = kinds[a]
+        kinds_b = kinds[b]
+        claimed = np.zeros(len(a), dtype=bool)
+        for kind_a, kind_b, handler in self.subscriptions[EVENT_COLLISION]:
+            kind_a = np.uint32(kind_a)
+            kind_b = np.uint32(kind_b)
+            forward = ((kinds_a & kind_a) == kind_a) & ((kinds_b & kind_b) == kind_b)
+            backward = ((kinds_b & kind_a) == kind_a) & ((kinds_a & kind_b) == kind_b) & ~forward
+            selected = forward | backward
+            if not selected.any():
+                continue
+            claimed |= selected
+
+            # Orient each pair so side a matches kind_a, keeping detection order
+            forward = forward[selected]
+            batch = CollisionBatch(
+                self,
+                np.where(forward, a[selected], b[selected]),
+                np.where(forward, b[selected], a[selected]),
+                np.where(forward, handles_a[selected], handles_b[selected]),
+                np.where(forward, handles_b[selected], handles_a[selected]),
+            )
+            handler(batch)
+
+        # Default: per-object dispatch for pairs nobody subscribed to
+        unclaimed = ~claimed
+        if unclaimed.any():
+            batch = CollisionBatch(self, a[unclaimed], b[unclaimed], handles_a[unclaimed], handles_b[unclaimed])
+            for obj1, obj2 in batch.live_pairs():
                 obj1.on_collision(obj2)
                 obj2.on_collision(obj1)
-                
-                # Logging (Skip Hamster-Hamster)
-                if "Hamster" in obj1.name and "Hamster" in obj2.name:
-                    continue
-                    
-                # log_msg = f"Collision: {obj1.name} <-> {obj2.name}"
-                # if len(self.logs) > 50:
-                #    self.logs.pop(0)
-                # self.logs.append(log_msg)
-
-    def get_render_queue(self):
+
+    def capture_previous(self):
+        # Remember the current positions as the interpolation start for the next tick
+        size = self.store.size
+        handles = np.full(size, -1, dtype=np.int64)
+        slots = self.store.slots_with(FLAG_IN_SCENE)
+        handles[slots] = self.registry.handles(slots)
+        self.previous_positions = self.store.positions[:size].copy()
+        self.previous_handles = handles
+
+    def _previous_translations(self, slots, current):
+        # Translations at capture_previous() for slots (N,), given their current ones (N, 3);
+        # objects that were not in the scene then keep their current translation
+        previous = current.copy()
+        handles = self.previous_handles
+        if handles is None:
+            return previous
+        slots = np.asarray(slots, dtype=np.int64)
+        known = slots < len(handles)
+        known[known] = handles[slots[known]] == self.registry.handles(slots[known])
+        previous[known] = self.previous_positions[slots[known]]
+        return previous
+
+    def get_render_queue(self, alpha=None, previous=False):
+        """
+        One batch per (mesh, program, texture) in first-seen order, each holding a
+        float32 (N, INSTANCE_FLOATS) snapshot of model matrices, UV scales and UV
+        rects for instanced drawing. Materials sharing a program and an atlas texture
+        land in one batch. Members are selected from the store's render_groups column
+        (filled when objects enter the scene), in slot order, without visiting objects.
+        Snapshots stay valid if the queue is consumed after later ticks.
+        With alpha, translations are blended between the state at capture_previous()
+        and the current one (see FixedStepClock.alpha). With previous, each batch also
+        carries those earlier translations as "previous" (N, 3) for blending later.
+        """
+        store = self.store
+        update_model_matrices(store)
+
+        in_scene = store.slots_with(FLAG_IN_SCENE)
+        group_of = store.render_groups[in_scene]
         queue = []
-        for obj in self.objects:
-            data = obj.get_render_data()
-            if data:
-                queue.append(data)
+        for group, (mesh, material) in enumerate(self.render_groups):
+            slots = in_scene[group_of == group]
+            if not len(slots):
+                continue
+            instances = np.empty((len(slots), INSTANCE_FLOATS), dtype=np.float32)
+            instances[:, :16] = store.model_matrices[slots]
+            instances[:, 16:] = store.uv_params[slots]
+            batch = {"mesh": mesh, "material": material, "instances": instances}
+            if (alpha is not None and alpha < 1.0) or previous:
+                current = instances[:, [3, 7, 11]]
+                start = self._previous_translations(slots, current)
+                if previous:
+                    batch["previous"] = start
+                if alpha is not None and alpha < 1.0:
+                    instances[:, [3, 7, 11]] = start + (current - start) * alpha
+            queue.append(batch)
         return queue
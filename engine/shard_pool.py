@@ -0,0 +1,204 @@
+import multiprocessing
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+from engine.array_utils import expand_ranges
+
+# Worker side: shared blocks attached so far, channel -> SharedMemory
+_attached = {}
+
+
+def _view(desc):
+    # ndarray over a shared block described by ShardPool.describe()
+    channel, name, shape, dtype = desc
+    shm = _attached.get(channel)
+    if shm is None or shm.name != name:
+        if shm is not None:
+            shm.close()
+        shm = _attached[channel] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _release_blocks(blocks):
+    # Unlinks every shared block; also runs at exit or collection (see ShardPool)
+    for channel in list(blocks):
+        shm, view = blocks.pop(channel)
+        del view # The buffer cannot be closed while a view exports it
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            shm.close()
+        except BufferError:
+            pass # A caller still holds a view; the mapping goes away with it
+
+
+def strip_bounds(x, shards):
+    """
+    Splits the x axis into `shards` strips holding about the same number of the
+    given centers. Strip i covers [edges[i], edges[i + 1]); the outer edges are
+    infinite so nothing falls outside.
+    """
+    edges = np.empty(shards + 1, dtype=np.float64)
+    edges[0] = -np.inf
+    edges[-1] = np.inf
+    if shards > 1:
+        edges[1:-1] = np.quantile(x, np.arange(1, shards) / shards) if len(x) else 0.0
+    return edges
+
+
+def _pair_kernel(args):
+    # Sort-and-sweep over the members touching one strip. A pair belongs to the
+    # strip holding the left edge of its overlap, so every pair is found once.
+    bounds_desc, x0, x1 = args
+    bounds = _view(bounds_desc)
+    local = np.flatnonzero((bounds[:, 0] < x1) & (bounds[:, 2] >= x0))
+    if len(local) < 2:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    box = bounds[local]
+    order = np.argsort(box[:, 0], kind="stable")
+    local = local[order]
+    box = box[order]
+    ends = np.searchsorted(box[:, 0], box[:, 2], side="right")
+    first, second = expand_ranges(np.arange(1, len(local) + 1), ends)
+
+    overlap_x = box[second, 0] # Later entry in min x order starts the overlap
+    keep = ((box[first, 1] <= box[second, 3]) & (box[second, 1] <= box[first, 3]) &
+            (overlap_x >= x0) & (overlap_x < x1))
+    return local[first[keep]], local[second[keep]]
+
+
+def _threat_kernel(args):
+    # Nearest predator for the prey centered in one strip; predators are read
+    # from the strip widened by the largest detection radius (the halo)
+    prey_desc, predators_desc, nearest_desc, x0, x1, halo, chunk_size = args
+    prey = _view(prey_desc)
+    predators = _view(predators_desc)
+    nearest_out = _view(nearest_desc)
+
+    rows = np.flatnonzero((prey[:, 0] >= x0) & (prey[:, 0] < x1))
+    if not len(rows):
+        return 0
+    nearby = np.flatnonzero((predators[:, 0] > x0 - halo) & (predators[:, 0] < x1 + halo))
+    if not len(nearby):
+        nearest_out[rows] = -1
+        return 0
+
+    predator_pos = predators[nearby]
+    detected_count = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        pos = prey[chunk, :2]
+        radii = prey[chunk, 2]
+
+        delta = pos[:, None, :] - predator_pos[None, :, :]
+        dist_sq = np.einsum("ijk,ijk->ij", delta, delta)
+
+        nearest = np.argmin(dist_sq, axis=1)
+        nearest_sq = dist_sq[np.arange(len(chunk)), nearest]
+        detected = nearest_sq < radii * radii
+        nearest_out[chunk] = np.where(detected, nearby[nearest], -1)
+        detected_count += int(np.count_nonzero(detected))
+    return detected_count
+
+
+class ShardPool:
+    """
+    Runs spatial kernels on x strips of the field in a multiprocessing pool.
+
+    Per call, entity columns are copied into shared memory blocks (grown as
+    needed, never per call) that workers map by name. The field is cut into one
+    strip per worker with equal entity counts; each worker owns the entities
+    centered in its strip and also reads a halo around it, so interactions
+    across strip edges match the single process result exactly. Ownership is
+    recomputed from positions on every call, which is how entities migrate
+    between shards. Pays off for large populations; small scenes are faster
+    in process. Shared blocks are unlinked by close(), and otherwise when the
+    pool is collected or the interpreter exits (e.g. after an exception).
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.pool = None # Started on first use
+        self.blocks = {} # channel -> (SharedMemory, array view)
+        self._finalizer = weakref.finalize(self, _release_blocks, self.blocks)
+
+    def _start(self):
+        # Started lazily, when the simulation, UI and log sink threads already run;
+        # fork() would copy whatever locks they hold into the workers, so use
+        # fresh interpreters (the kernels are module level and import cleanly)
+        if self.pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self.pool = context.Pool(self.workers)
+        return self.pool
+
+    def array(self, channel, count, width=0, dtype=np.float32):
+        """
+        Shared (count, width) array for a channel (count,) when width is 0.
+        Contents are undefined; the block is reallocated only when too small.
+        """
+        dtype = np.dtype(dtype)
+        shape = (count, width) if width else (count,)
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = self.blocks.get(channel)
+        if block is None or block[0].size < nbytes:
+            if block is not None:
+                block = None
+                _release_blocks({channel: self.blocks.pop(channel)})
+            shm = shared_memory.SharedMemory(create=True, size=max(nbytes * 2, 4096))
+            block = self.blocks[channel] = (shm, None)
+        view = np.ndarray(shape, dtype=dtype, buffer=block[0].buf)
+        self.blocks[channel] = (block[0], view)
+        return view
+
+    def describe(self, channel):
+        shm, view = self.blocks[channel]
+        return (channel, shm.name, view.shape, view.dtype.str)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        _release_blocks(self.blocks)
+
+    def candidate_pairs(self, bounds):
+        """
+        Overlapping (inclusive) pairs among AABBs (N, 4) as index arrays into
+        bounds, each pair once, the same set a sort-and-sweep finds.
+        """
+        count = len(bounds)
+        shared = self.array("bounds", count, 4)
+        shared[:] = bounds
+        edges = strip_bounds((bounds[:, 0] + bounds[:, 2]) * 0.5, self.workers)
+        desc = self.describe("bounds")
+
+        tasks = [(desc, edges[i], edges[i + 1]) for i in range(self.workers)]
+        results = self._start().map(_pair_kernel, tasks)
+        first = np.concatenate([r[0] for r in results])
+        second = np.concatenate([r[1] for r in results])
+        return first, second
+
+    def nearest_threats(self, prey_pos, prey_radii, predator_pos, chunk_size=4096):
+        """
+        For each prey, the index of the nearest predator if it is inside the prey's
+        radius, else -1. Same result (including ties) as one pass over all predators.
+        """
+        count = len(prey_pos)
+        prey = self.array("prey", count, 3)
+        prey[:, :2] = prey_pos
+        prey[:, 2] = prey_radii
+        predators = self.array("predators", len(predator_pos), 2)
+        predators[:] = predator_pos
+        nearest = self.array("nearest", count, dtype=np.int64)
+
+        edges = strip_bounds(prey_pos[:, 0], self.workers)
+        halo = float(prey_radii.max())
+        descs = (self.describe("prey"), self.describe("predators"), self.describe("nearest"))
+        tasks = [descs + (edges[i], edges[i + 1], halo, chunk_size) for i in range(self.workers)]
+        self._start().map(_threat_kernel, tasks)
+        return nearest.copy()
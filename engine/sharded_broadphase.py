@@ -0,0 +1,31 @@
+import numpy as np
+from engine.array_utils import ordered_pairs
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
+from engine.sweep_and_prune import SweepAndPrune
+
+class ShardedBroadphase(SweepAndPrune):
+    """
+    Sort-and-sweep whose candidate_pairs() runs on x strips in a ShardPool
+    (see engine.shard_pool). Queries stay in process on the sorted structure.
+    Pairs come back in the same order as SweepAndPrune.candidate_pairs() for
+    any worker count, so collision handling (and the simulation) is identical.
+    Without a pool it behaves exactly like SweepAndPrune.
+    """
+    name = "sharded"
+
+    def __init__(self, store, pool=None, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        super().__init__(store, required_flags)
+        self.pool = pool
+
+    def candidate_pairs(self):
+        if self.pool is None:
+            return super().candidate_pairs()
+        if len(self.order) < 2:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        # Workers return positions in the sorted bounds, first before second;
+        # the in-process sweep emits them by (first, second)
+        first, second = self.pool.candidate_pairs(self.bounds)
+        order = np.lexsort((second, first))
+        return ordered_pairs(self.order[first[order]], self.order[second[order]])
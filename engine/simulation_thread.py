@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+
+
+class RenderSnapshot:
+    """
+    Immutable render state published by the simulation: the render queue of one
+    moment (read-only instance arrays) plus each batch's previous translations.
+    batches(now) blends between the two by how much real time has passed since
+    publication, so frames between sim ticks still move smoothly. `overlay` is
+    the matching World.capture_overlay() for the UI and debug drawing.
+    """
+    def __init__(self, queue, published, alpha=None, step_seconds=None, overlay=None):
+        for batch in queue:
+            for key in ("instances", "previous"):
+                if key in batch:
+                    batch[key].setflags(write=False)
+        self.queue = queue
+        self.published = published # time.perf_counter() at publication
+        self.alpha = alpha # Interpolation factor at publication, None = draw as is
+        self.step_seconds = step_seconds # Real seconds per sim step
+        self.overlay = overlay
+
+    def batches(self, now=None):
+        if self.alpha is None or not self.step_seconds:
+            return self.queue
+
+        if now is None:
+            now = time.perf_counter()
+        alpha = min(self.alpha + (now - self.published) / self.step_seconds, 1.0)
+        blended = []
+        for batch in self.queue:
+            start = batch.get("previous")
+            if start is None:
+                blended.append(batch)
+                continue
+            instances = batch["instances"].copy()
+            instances[:, [3, 7, 11]] = start + (instances[:, [3, 7, 11]] - start) * alpha
+            blended.append({"mesh": batch["mesh"], "material": batch["material"], "instances": instances})
+        return blended
+
+
+class SimulationThread:
+    """
+    Runs World.update on a background thread at the world's fixed tick rate and
+    publishes a RenderSnapshot to the renderer after every update that changed
+    the scene. Other threads must not mutate the world directly: post() queues
+    a call that runs on the simulation thread between updates. Other threads
+    read the scene only through the published snapshot (including its overlay),
+    never the live world, so they do not wait on world.lock while a step runs.
+    """
+    max_sleep = 1.0 / 120.0 # Poll interval for commands while paused or idle
+
+    def __init__(self, world, renderer):
+        self.world = world
+        self.renderer = renderer
+        self.commands = queue.SimpleQueue()
+        self.running = threading.Event()
+        self.thread = None
+        self.overlay_flags = None # Renderer toggles the last overlay was captured with
+
+    def post(self, fn, *args):
+        self.commands.put((fn, args))
+
+    def start(self):
+        self.running.set()
+        self.thread = threading.Thread(target=self._run, name="Simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _apply_commands(self):
+        applied = 0
+        while True:
+            try:
+                fn, args = self.commands.get_nowait()
+            except queue.Empty:
+                return applied
+            with self.world.lock:
+                fn(*args)
+            applied += 1
+
+    def publish(self):
+        world = self.world
+        scene_manager = world.scene_manager
+        self.overlay_flags = debug_shapes, hamster_bars = self._overlay_flags()
+        with world.lock:
+            render_queue = scene_manager.get_render_queue(previous=True)
+            alpha = world.render_alpha
+            time_scale = world.setting.time_scale
+            overlay = world.capture_overlay(debug_shapes, hamster_bars)
+        step_seconds = world.clock.step / time_scale if time_scale > 0 else None
+        self.renderer.submit_queue(RenderSnapshot(render_queue, time.perf_counter(), alpha, step_seconds, overlay))
+
+    def _overlay_flags(self):
+        # Optional overlay parts, only captured while the renderer shows them
+        renderer = self.renderer
+        return (renderer.show_aabb or renderer.show_sphere, renderer.show_hamster_bars)
+
+    def _run(self):
+        world = self.world
+        last = time.perf_counter()
+        changed = True # Publish the initial state
+        while self.running.is_set():
+            changed |= self._apply_commands() > 0
+
+            now = time.perf_counter()
+            changed |= world.update(now - last) > 0
+            last = now
+            changed |= self._overlay_flags() != self.overlay_flags # Toggled while paused
+
+            if changed:
+                self.publish()
+                changed = False
+
+            # Sleep until the next step is due (or poll for commands)
+            wait = self.max_sleep
+            time_scale = world.setting.time_scale
+            if not world.scene_manager.is_paused and time_scale > 0:
+                wait = min(wait, (world.clock.step - world.clock.accumulator) / time_scale)
+            time.sleep(max(wait, 0.0))
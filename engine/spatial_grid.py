@@ -1,41 +1,333 @@
-from collections import defaultdict
+import math
+import numpy as np
+from engine.array_utils import expand_ranges, cross_ranges, ordered_pairs
+from engine.broadphase import Broadphase
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
 
-class SpatialGrid:
-    def __init__(self, cell_size):
-        self.cell_size = cell_size
-        self.cells = defaultdict(list)
+class SpatialGrid(Broadphase):
+    """
+    Uniform grid over EntityStore slots with CSR cell storage.
+
+    Each collidable entity is binned once, by its center, into a dense cell id
+    (row-major over the occupied extent). `offsets[c]:offsets[c + 1]` indexes the
+    run of `index` holding the slots of cell c. Queries widen their box by the
+    largest entity half extent so center binning never misses an overlap.
+
+    update() re-bins only the slots whose cell changed since the last call and
+    falls back to a full counting-sort rebuild when many moved or an entity left
+    the current extent.
+
+    With cell_size=None the cell size follows the largest member diameter,
+    re-chosen on every full rebuild.
+    """
+    name = "grid"
+    # Fraction of members that may change cell before a full rebuild is cheaper
+    rebuild_fraction = 0.25
+    # Extra cells around the occupied extent, so small moves stay incremental
+    margin = 2
+
+    def __init__(self, store, cell_size=None, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        super().__init__(store, required_flags)
+        self.auto_cell_size = cell_size is None
+        self.cell_size = cell_size if cell_size else 1.0
+        self.clear()
 
     def clear(self):
-        self.cells.clear()
-
-    def insert(self, obj):
-        # Determine cell range using AABB
-        bounds = obj.get_world_bounds() # min_x, min_y, max_x, max_y
-        
-        start_x = int(bounds[0] / self.cell_size)
-        start_y = int(bounds[1] / self.cell_size)
-        end_x = int(bounds[2] / self.cell_size)
-        end_y = int(bounds[3] / self.cell_size)
-        
-        for x in range(start_x, end_x + 1):
-            for y in range(start_y, end_y + 1):
-                self.cells[(x, y)].append(obj)
-
-    def retrieve(self, obj):
-        # Return unique objects in all occupied cells
-        found_objects = set()
-        
-        bounds = obj.get_world_bounds()
-        
-        start_x = int(bounds[0] / self.cell_size)
-        start_y = int(bounds[1] / self.cell_size)
-        end_x = int(bounds[2] / self.cell_size)
-        end_y = int(bounds[3] / self.cell_size)
-        
-        for x in range(start_x, end_x + 1):
-            for y in range(start_y, end_y + 1):
-                cell = (x, y)
-                if cell in self.cells:
-                    found_objects.update(self.cells[cell])
-        
-        return list(found_objects)
+        self.slot_cells = np.full(self.store.capacity, -1, dtype=np.int64)
+        self.index = np.empty(0, dtype=np.intp) # Slots sorted by cell
+        self.offsets = np.zeros(1, dtype=np.intp)
+        self.counts = np.zeros(0, dtype=np.intp)
+        self.origin = (0, 0) # Cell coords of dense cell 0
+        self.dims = (0, 0)
+        self.max_half = 0.0
+        self.extent = None
+        self.rebuilds = 0
+        self.incremental_updates = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def cell_of(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def _cell_coords(self, slots):
+        return np.floor(self.store.positions[slots, :2] / self.cell_size).astype(np.int64)
+
+    def _dense_ids(self, coords):
+        return (coords[:, 0] - self.origin[0]) * self.dims[1] + (coords[:, 1] - self.origin[1])
+
+    def _inside(self, coords):
+        ox, oy = self.origin
+        nx, ny = self.dims
+        return ((coords[:, 0] >= ox) & (coords[:, 0] < ox + nx) &
+                (coords[:, 1] >= oy) & (coords[:, 1] < oy + ny))
+
+    def search_radius(self):
+        return self.cell_size
+
+    def update(self, members=None):
+        store = self.store
+        size = store.size
+        if len(self.slot_cells) < store.capacity:
+            grown = np.full(store.capacity, -1, dtype=np.int64)
+            grown[:len(self.slot_cells)] = self.slot_cells
+            self.slot_cells = grown
+
+        if members is None:
+            members = self.member_slots()
+        self.set_extent(members)
+
+        if len(members):
+            self.max_half = float(self.half_extents(members).max())
+        else:
+            self.max_half = 0.0
+
+        coords = self._cell_coords(members)
+        if len(members) and (not self.dims[0] or not self._inside(coords).all()):
+            self._rebuild(members, coords)
+            return
+
+        new_cells = np.full(size, -1, dtype=np.int64)
+        new_cells[members] = self._dense_ids(coords)
+        old_cells = self.slot_cells[:size]
+        changed = np.flatnonzero(new_cells != old_cells)
+        if not len(changed):
+            return
+
+        if len(changed) > self.rebuild_fraction * max(len(members), 1):
+            self._rebuild(members, coords)
+            return
+
+        self._rebin(changed, old_cells[changed], new_cells[changed])
+
+    def _rebuild(self, members, coords):
+        self.rebuilds += 1
+        self.slot_cells[:] = -1
+        if self.auto_cell_size and len(members):
+            cell_size = max(self.max_half * 2.0, 1e-3)
+            if cell_size != self.cell_size:
+                self.cell_size = cell_size
+                coords = self._cell_coords(members)
+        if not len(members):
+            self.index = np.empty(0, dtype=np.intp)
+            self.offsets = np.zeros(1, dtype=np.intp)
+            self.counts = np.zeros(0, dtype=np.intp)
+            self.dims = (0, 0)
+            return
+
+        lo = coords.min(axis=0) - self.margin
+        hi = coords.max(axis=0) + self.margin
+        self.origin = (int(lo[0]), int(lo[1]))
+        self.dims = (int(hi[0] - lo[0]) + 1, int(hi[1] - lo[1]) + 1)
+
+        # Counting sort: per-cell counts -> offsets, then stable placement
+        ids = self._dense_ids(coords)
+        self.counts = np.bincount(ids, minlength=self.dims[0] * self.dims[1])
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+        self.index = members[np.argsort(ids, kind="stable")]
+        self.slot_cells[members] = ids
+
+    def _rebin(self, changed, old_ids, new_ids):
+        self.incremental_updates += 1
+        ncells = len(self.counts)
+
+        left = old_ids >= 0
+        if left.any():
+            self.counts -= np.bincount(old_ids[left], minlength=ncells)
+        entered = new_ids >= 0
+        if entered.any():
+            self.counts += np.bincount(new_ids[entered], minlength=ncells)
+
+        # Drop changed slots, then insert them back at their new cell runs
+        self.slot_cells[changed] = new_ids
+        keep = self.index[np.isin(self.index, changed, assume_unique=True, invert=True)]
+        keep_ids = self.slot_cells[keep]
+
+        moved = changed[entered]
+        moved_ids = new_ids[entered]
+        order = np.argsort(moved_ids, kind="stable")
+        moved = moved[order]
+        moved_ids = moved_ids[order]
+        positions = np.searchsorted(keep_ids, moved_ids, side="right")
+
+        self.index = np.insert(keep, positions, moved)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+    def _box_ranges(self, min_x, min_y, max_x, max_y):
+        start_x, start_y = self.cell_of(min_x, min_y)
+        end_x, end_y = self.cell_of(max_x, max_y)
+        return self._cell_ranges(start_x, start_y, end_x, end_y)
+
+    def _cell_ranges(self, start_x, start_y, end_x, end_y):
+        # Index ranges of the CSR runs covering a block of cells (clipped to the extent)
+        if not len(self.index):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        ox, oy = self.origin
+        nx, ny = self.dims
+        start_x = max(start_x, ox)
+        start_y = max(start_y, oy)
+        end_x = min(end_x, ox + nx - 1)
+        end_y = min(end_y, oy + ny - 1)
+        if start_x > end_x or start_y > end_y:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        # Cells of one grid column are contiguous in the row-major ids
+        columns = np.arange(start_x - ox, end_x - ox + 1) * ny
+        first = columns + (start_y - oy)
+        last = columns + (end_y - oy)
+        return self.offsets[first], self.offsets[last + 1]
+
+    def query_aabb(self, min_x, min_y, max_x, max_y):
+        # Candidate slots whose bounds may overlap the box
+        pad = self.max_half
+        starts, ends = self._box_ranges(min_x - pad, min_y - pad, max_x + pad, max_y + pad)
+        _, positions = expand_ranges(starts, ends)
+        return self.index[positions]
+
+    def _neighbor_runs(self, cells_x, cells_y, dx, dy):
+        # CSR run (start, count) of the cell offset by (dx, dy); empty outside the extent
+        nx, ny = self.dims
+        tx = cells_x + dx
+        ty = cells_y + dy
+        inside = (tx >= 0) & (tx < nx) & (ty >= 0) & (ty < ny)
+        ids = np.where(inside, tx * ny + ty, 0)
+        starts = self.offsets[ids]
+        counts = np.where(inside, self.counts[ids], 0)
+        return starts, counts
+
+    def _reach(self, half):
+        # Cells two centers may be apart and still overlap
+        return max(int(math.ceil(half / self.cell_size)), 1)
+
+    def candidate_pairs(self):
+        """
+        All member pairs (a, b), a < b, binned in cells close enough to overlap.
+        Walks occupied cells against themselves and half of their neighborhood,
+        so every pair comes out exactly once.
+        """
+        occupied = np.flatnonzero(self.counts)
+        if not len(occupied):
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        cells_x, cells_y = np.divmod(occupied, self.dims[1])
+        starts = self.offsets[occupied]
+        counts = self.counts[occupied]
+        reach = self._reach(self.max_half * 2.0)
+
+        # Same cell: keep each unordered pair once
+        a, b = cross_ranges(starts, counts, starts, counts)
+        keep = a < b
+        pairs_a = [a[keep]]
+        pairs_b = [b[keep]]
+
+        # Half neighborhood: dx > 0, or dx == 0 and dy > 0
+        for dx in range(0, reach + 1):
+            for dy in range(-reach, reach + 1):
+                if dx == 0 and dy <= 0:
+                    continue
+                n_starts, n_counts = self._neighbor_runs(cells_x, cells_y, dx, dy)
+                a, b = cross_ranges(starts, counts, n_starts, n_counts)
+                pairs_a.append(a)
+                pairs_b.append(b)
+
+        a = self.index[np.concatenate(pairs_a)]
+        b = self.index[np.concatenate(pairs_b)]
+        return ordered_pairs(a, b)
+
+    def pairs_with(self, slots, query_half):
+        """
+        Pairs (slot, member) between outside slots and this grid's members that
+        are binned close enough to overlap. query_half is the largest half extent
+        among slots.
+        """
+        empty = np.empty(0, dtype=np.intp)
+        if not len(self.index) or not len(slots):
+            return empty, empty
+
+        coords = self._cell_coords(slots)
+        cells_x = coords[:, 0] - self.origin[0]
+        cells_y = coords[:, 1] - self.origin[1]
+        reach = self._reach(query_half + self.max_half)
+
+        owners = []
+        members = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                n_starts, n_counts = self._neighbor_runs(cells_x, cells_y, dx, dy)
+                owner, position = expand_ranges(n_starts, n_starts + n_counts)
+                owners.append(owner)
+                members.append(position)
+
+        return slots[np.concatenate(owners)], self.index[np.concatenate(members)]
+
+    def ring_slots(self, cx, cy, ring):
+        # Slots binned in the cells at Chebyshev distance `ring` from cell (cx, cy)
+        if ring == 0:
+            starts, ends = self._cell_ranges(cx, cy, cx, cy)
+        else:
+            # Bottom and top rows, then left and right columns without corners
+            blocks = [
+                (cx - ring, cy - ring, cx + ring, cy - ring),
+                (cx - ring, cy + ring, cx + ring, cy + ring),
+                (cx - ring, cy - ring + 1, cx - ring, cy + ring - 1),
+                (cx + ring, cy - ring + 1, cx + ring, cy + ring - 1),
+            ]
+            ranges = [self._cell_ranges(*block) for block in blocks]
+            starts = np.concatenate([r[0] for r in ranges])
+            ends = np.concatenate([r[1] for r in ranges])
+        _, positions = expand_ranges(starts, ends)
+        return self.index[positions]
+
+    def nearest(self, x, y, k=1, max_dist=None, required_flags=0):
+        """
+        Ring-by-ring expanding search from the cell containing (x, y).
+        Returns (slots, distances) for up to k members sorted by center distance.
+        Only slots with every bit of required_flags set are considered.
+        """
+        empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32))
+        if not len(self.index) or k <= 0:
+            return empty
+
+        cx, cy = self.cell_of(x, y)
+        ox, oy = self.origin
+        nx, ny = self.dims
+        max_ring = max(cx - ox, ox + nx - 1 - cx, cy - oy, oy + ny - 1 - cy, 0)
+        if max_dist is not None:
+            max_ring = min(max_ring, int(max_dist / self.cell_size) + 1)
+
+        positions = self.store.positions
+        flags = self.store.flags
+        found_slots = []
+        found_dist = []
+        count = 0
+
+        for ring in range(max_ring + 1):
+            slots = self.ring_slots(cx, cy, ring)
+            if required_flags and len(slots):
+                slots = slots[(flags[slots] & required_flags) == required_flags]
+            if len(slots):
+                delta = positions[slots, :2] - (x, y)
+                dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+                if max_dist is not None:
+                    within = dist <= max_dist
+                    slots = slots[within]
+                    dist = dist[within]
+                found_slots.append(slots)
+                found_dist.append(dist)
+                count += len(slots)
+
+            if count >= k:
+                dist = np.concatenate(found_dist)
+                # Anything in later rings is at least ring * cell_size away
+                if np.partition(dist, k - 1)[k - 1] <= ring * self.cell_size:
+                    break
+
+        if not count:
+            return empty
+
+        slots = np.concatenate(found_slots)
+        dist = np.concatenate(found_dist)
+        order = np.lexsort((slots, dist))[:k]
+        return slots[order], dist[order]
@@ -0,0 +1,69 @@
+import numpy as np
+from engine.array_utils import expand_ranges, ordered_pairs
+from engine.broadphase import Broadphase
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_IN_SCENE
+
+class SweepAndPrune(Broadphase):
+    """
+    Sort-and-sweep broadphase: members sorted by AABB min x.
+
+    A query only scans the sorted run whose min x can still overlap the box
+    (max x is at most min x + widest member), then filters the rest with arrays.
+    The previous order is reused as the starting permutation, so the stable sort
+    runs over nearly sorted data when entities move a little per tick.
+    """
+    name = "sap"
+
+    def __init__(self, store, required_flags=FLAG_COLLIDABLE | FLAG_IN_SCENE):
+        super().__init__(store, required_flags)
+        self.clear()
+
+    def clear(self):
+        self.order = np.empty(0, dtype=np.intp) # Slots sorted by min x
+        self.min_x = np.empty(0, dtype=np.float32)
+        self.bounds = np.empty((0, 4), dtype=np.float32) # Per sorted entry: min_x, min_y, max_x, max_y
+        self.max_width = 0.0
+        self.extent = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def search_radius(self):
+        return max(self.max_width, 1e-3)
+
+    def update(self, members=None):
+        if members is None:
+            members = self.member_slots()
+        self.set_extent(members)
+
+        # Keep surviving slots in their previous order, append newcomers
+        if len(self.order):
+            previous = self.order[np.isin(self.order, members, assume_unique=True)]
+            added = members[np.isin(members, previous, assume_unique=True, invert=True)]
+            members = np.concatenate((previous, added))
+
+        pos = self.store.positions[members, :2]
+        half = self.half_extents(members)
+        min_x = pos[:, 0] - half[:, 0]
+
+        order = np.argsort(min_x, kind="stable")
+        self.order = members[order]
+        self.min_x = min_x[order]
+        self.bounds = np.concatenate((pos - half, pos + half), axis=1)[order]
+        self.max_width = float((half[:, 0] * 2.0).max()) if len(members) else 0.0
+
+    def query_aabb(self, min_x, min_y, max_x, max_y):
+        lo = np.searchsorted(self.min_x, min_x - self.max_width, side="left")
+        hi = np.searchsorted(self.min_x, max_x, side="right")
+        bounds = self.bounds[lo:hi]
+        hit = (bounds[:, 2] >= min_x) & (bounds[:, 1] <= max_y) & (bounds[:, 3] >= min_y)
+        return self.order[lo:hi][hit]
+
+    def candidate_pairs(self):
+        # Sweep: entry i only meets later entries whose min x is within its max x
+        count = len(self.order)
+        ends = np.searchsorted(self.min_x, self.bounds[:, 2], side="right")
+        first, second = expand_ranges(np.arange(1, count + 1), ends)
+        bounds = self.bounds
+        hit = (bounds[first, 1] <= bounds[second, 3]) & (bounds[second, 1] <= bounds[first, 3])
+        return ordered_pairs(self.order[first[hit]], self.order[second[hit]])
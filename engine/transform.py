@@ -1,71 +1,129 @@
 import numpy as np
-from OpenGL.GL import *
+import weakref
+from engine.entity_store import default_store, FLAG_MATRIX_DIRTY, FLAG_TRANSFORM_DIRTY
 
-# Vector3 based on array
-class Vector3:
+class _DetachedRow:
+    # Backing storage for a Vector3 that does not live in an EntityStore
     def __init__(self, x, y, z):
-        self.data = np.array([x, y, z], dtype=np.float32)
+        self.values = np.array([[x, y, z]], dtype=np.float32)
+
+# Vector3 as a view onto one row of an EntityStore field
+# Writes set the `dirty` flag bits on the slot so cached data derived from it is refreshed
+class Vector3:
+    __slots__ = ("_store", "_field", "_slot", "_dirty")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, store=None, field="positions", slot=0, dirty=0):
+        if store is None:
+            store = _DetachedRow(x, y, z)
+            field = "values"
+            slot = 0
+            dirty = 0
+        self._store = store
+        self._field = field
+        self._slot = slot
+        self._dirty = dirty
+        getattr(store, field)[slot] = (x, y, z)
+
+    def _touch(self):
+        if self._dirty:
+            self._store.flags[self._slot] |= self._dirty
+
+    @property
+    def data(self):
+        # Read-only row view (writes must go through the setters so dirty flags are set);
+        # do not hold on to it across EntityStore growth
+        row = getattr(self._store, self._field)[self._slot].view()
+        row.setflags(write=False)
+        return row
+
+    @data.setter
+    def data(self, values):
+        getattr(self._store, self._field)[self._slot] = values
+        self._touch()
 
     def X(self):
-        return self.data[0]
+        return getattr(self._store, self._field)[self._slot, 0]
     def Y(self):
-        return self.data[1]
+        return getattr(self._store, self._field)[self._slot, 1]
     def Z(self):
-        return self.data[2]
+        return getattr(self._store, self._field)[self._slot, 2]
 
     def SetX(self, x):
-        self.data[0] = x
+        getattr(self._store, self._field)[self._slot, 0] = x
+        self._touch()
     def SetY(self, y):
-        self.data[1] = y
+        getattr(self._store, self._field)[self._slot, 1] = y
+        self._touch()
     def SetZ(self, z):
-        self.data[2] = z
-
-    def Set(self, x, y, z):
-        self.data[0] = x
-        self.data[1] = y
-        self.data[2] = z
+        getattr(self._store, self._field)[self._slot, 2] = z
+        self._touch()
 
-    def Set(self, f):
-        self.data[0] = f
-        self.data[1] = f
-        self.data[2] = f
+    def Set(self, x, y=None, z=None):
+        # Set(f) sets all components, Set(x, y, z) sets each
+        if y is None:
+            y = z = x
+        getattr(self._store, self._field)[self._slot] = (x, y, z)
+        self._touch()
 
 
 
 class Transform:
-    def __init__(self, position=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
-        self.position = Vector3(position[0], position[1], position[2])
-        self.rotation = Vector3(rotation[0], rotation[1], rotation[2]) # Euler angles in degrees
-        self.scale = Vector3(scale[0], scale[1], scale[2])
-
-    def get_rotation_matrix(self):
-        cx, cy, cz = np.cos([self.rotation.X(), self.rotation.Y(), self.rotation.Z()])
-        sx, sy, sz = np.sin([self.rotation.X(), self.rotation.Y(), self.rotation.Z()])
-        
-        R = np.array([
-            [cz*cy,  cz*sy*sx - sz*cx,  cz*sy*cx + sz*sx,  0],
-            [sz*cy,  sz*sy*sx + cz*cx,  sz*sy*cx - cz*sx,  0],
-            [-sy,    cy*sx,             cy*cx,             0],
-            [0,      0,                 0,                 1]
-        ])
-        return R
-
-    def get_scale_matrix(self):
-        scale_matrix = np.array([
-            [self.scale.X(), 0, 0, 0],
-            [0, self.scale.Y(), 0, 0],
-            [0, 0, self.scale.Z(), 0],
-            [0, 0, 0, 1]
-        ])
-        return scale_matrix
-
-    def get_model_matrix(self):
-        model = np.identity(4, dtype=np.float32)
-
-        rot_matrix = self.get_rotation_matrix()
-        scale_matrix = self.get_scale_matrix()
-
-        model = scale_matrix @ rot_matrix
-        model[3, :3] = self.position.data
-        return model.transpose()
-       
+    def __init__(self, position=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1), store=None):
+        self.store = store if store is not None else default_store
+        self.slot = self.store.allocate()
+        # Give the slot back once this transform is garbage collected; collection
+        # can happen on any thread, so the store frees it on its next allocate()
+        weakref.finalize(self, self.store.release_later, self.slot)
+
+        # Bounds ignore rotation (axis aligned), so rotation only dirties the matrix
+        self.position = Vector3(position[0], position[1], position[2], self.store, "positions", self.slot, FLAG_TRANSFORM_DIRTY)
+        self.rotation = Vector3(rotation[0], rotation[1], rotation[2], self.store, "rotations", self.slot, FLAG_MATRIX_DIRTY) # Euler angles in degrees
+        self.scale = Vector3(scale[0], scale[1], scale[2], self.store, "scales", self.slot, FLAG_TRANSFORM_DIRTY)
+
+
+def update_model_matrices(store, slots=None):
+    """
+    Recomputes store.model_matrices for dirty slots (or the given slots) in one
+    vectorized pass and clears their FLAG_MATRIX_DIRTY. Returns the number updated.
+
+    Layout is scale @ rotation with translation in the last row, transposed.
+    Slots without rotation (everything in the sim so far) take the
+    translation + scale fast path and skip the trigonometry.
+    """
+    if slots is None:
+        slots = store.slots_with(FLAG_MATRIX_DIRTY)
+    else:
+        slots = np.asarray(slots, dtype=np.intp)
+    count = len(slots)
+    if not count:
+        return 0
+
+    scale = store.scales[slots]
+    rotation = store.rotations[slots]
+
+    model = np.zeros((count, 4, 4), dtype=np.float32)
+    diagonal = np.arange(3)
+    model[:, diagonal, diagonal] = scale
+    model[:, :3, 3] = store.positions[slots]
+    model[:, 3, 3] = 1.0
+
+    rotated = np.flatnonzero(rotation.any(axis=1))
+    if len(rotated):
+        cx, cy, cz = np.cos(rotation[rotated]).T
+        sx, sy, sz = np.sin(rotation[rotated]).T
+        R = np.empty((len(rotated), 3, 3), dtype=np.float32)
+        R[:, 0, 0] = cz*cy
+        R[:, 0, 1] = cz*sy*sx - sz*cx
+        R[:, 0, 2] = cz*sy*cx + sz*sx
+        R[:, 1, 0] = sz*cy
+        R[:, 1, 1] = sz*sy*sx + cz*cx
+        R[:, 1, 2] = sz*sy*cx - cz*sx
+        R[:, 2, 0] = -sy
+        R[:, 2, 1] = cy*sx
+        R[:, 2, 2] = cy*cx
+        # (S @ R) transposed: column i is row i of R scaled by scale[i]
+        model[rotated, :3, :3] = (R * scale[rotated, :, None]).transpose(0, 2, 1)
+
+    store.model_matrices[slots] = model.reshape(count, 16)
+    store.flags[slots] &= ~np.uint32(FLAG_MATRIX_DIRTY)
+    return count
@@ -1,12 +1,21 @@
 from engine.scene_manager import SceneManager
+from engine.movement_system import MovementSystem
 from engine.world_setting import WorldSetting
 from engine.camera import Camera
 from engine.mesh import Mesh
 from engine.material import Material
+from engine.resource_manager import ResourceManager
+from engine.entity_store import KIND_FLOOR, KIND_HAMSTER, KIND_CAT, FLAG_IN_SCENE
+from engine.collision_events import EVENT_COLLISION
+from engine.fixed_step import FixedStepClock
+from engine.shard_pool import ShardPool
 from game_objects.object import Object
-from game_objects.components.ai_component import HamsterAIComponent, CatAIComponent
+from game_objects.components.ai_component import BaseAIComponent, HamsterAIComponent, CatAIComponent, on_cat_hamster_collisions, on_hamster_collisions
+from game_objects.systems.flee_system import FleeSystem
+from game_objects.systems.mating_system import MatingSystem
 
 import random
+import threading
 from OpenGL.GL import *
 from OpenGL.GLU import gluUnProject
 import numpy as np
@@ -15,32 +24,59 @@ import math
 class World:
     def __init__(self, screen_width, screen_height):
         self.setting = WorldSetting(10, 10)
-        self.scene_manager = SceneManager()
+        self.scene_manager = SceneManager(broadphase=self.setting.broadphase)
+        # Batched queries before component ticks, batched movement after them
+        self.flee = FleeSystem(self.scene_manager.store)
+        self.mating = MatingSystem(self.scene_manager.store)
+        self.shards = None # ShardPool, see set_shards()
+        component_system = self.scene_manager.component_system
+        self.scene_manager.register_system(self.flee, before=component_system)
+        self.scene_manager.register_system(self.mating, before=component_system)
+        self.scene_manager.register_system(MovementSystem(self.scene_manager.store, self.setting))
+        self.scene_manager.subscribe(EVENT_COLLISION, on_cat_hamster_collisions, KIND_CAT, KIND_HAMSTER)
+        self.scene_manager.subscribe(EVENT_COLLISION, on_hamster_collisions, KIND_HAMSTER, KIND_HAMSTER)
         self.camera = Camera(position=(0, 0, 10))
+        self.lock = threading.RLock() # Held per sim step; guards scene reads from other threads (see SimulationThread)
+        self.clock = FixedStepClock(self.setting.tick_rate, self.setting.max_substeps, self.setting.catch_up)
         
         # Game State
-        self.selected_object = None
+        self.selected_handle = None
+        self.hamster_serial = 0 # Next hamster name number, see spawn_hamster
         
-        # Resources
+        # Resources (stay empty when running headless without a GL context)
         self.quad_mesh = None
         self.materials = {}
+        self.resources = ResourceManager() # Shared shader programs, textures and sprite atlas
         
     def load_assets(self):
         self.quad_mesh = Mesh.create_quad()
-        self.materials["mouse"] = Material("assets/shaders/default.vert", "assets/shaders/default.frag", "assets/textures/mouse.png")
-        self.materials["wood"] = Material("assets/shaders/default.vert", "assets/shaders/default.frag", "assets/textures/woodtile.png")
-        self.materials["cat"] = Material("assets/shaders/default.vert", "assets/shaders/default.frag", "assets/textures/cat.png")
+        vert = "assets/shaders/instanced.vert"
+        frag = "assets/shaders/default.frag"
+
+        # Creature sprites share one atlas texture (one batch); the tiled floor keeps its own
+        self.resources.build_atlas({
+            "mouse": "assets/textures/mouse.png",
+            "cat": "assets/textures/cat.png",
+        })
+        for name in ("mouse", "cat"):
+            material = Material(vert, frag, resources=self.resources)
+            material.use_sprite(name)
+            self.materials[name] = material
+        self.materials["wood"] = Material(vert, frag, "assets/textures/woodtile.png", resources=self.resources)
 
     def reset(self):
         self.scene_manager.clear()
+        self.sync_clock()
+        self.clock.reset()
+        self.hamster_serial = 0
         self.selected_object = None
         
         width, height = self.setting.field_size
         
         # Floor
-        tile = Object(name="Floor")
+        tile = Object(name="Floor", store=self.scene_manager.store, kind=KIND_FLOOR)
         tile.set_mesh(self.quad_mesh)
-        tile.set_material(self.materials["wood"])
+        tile.set_material(self.materials.get("wood"))
         tile.enable_collision_event = False
         tile.transform.scale.SetX(width)
         tile.transform.scale.SetY(height)
@@ -51,11 +87,13 @@ class World:
         # Hamsters
     def spawn_hamster(self, x, y, is_baby=False):
         # Unique Name
-        idx = len([o for o in self.scene_manager.objects if "Hamster" in o.name])
+        # Monotonic, so babies born in the same tick (adds are deferred) get distinct names
+        idx = self.hamster_serial
+        self.hamster_serial += 1
         name_prefix = "Baby Hamster" if is_baby else "Hamster"
-        hamster = Object(name=f"{name_prefix} {idx}")
+        hamster = Object(name=f"{name_prefix} {idx}", store=self.scene_manager.store, kind=KIND_HAMSTER)
         hamster.set_mesh(self.quad_mesh)
-        hamster.set_material(self.materials["mouse"])
+        hamster.set_material(self.materials.get("mouse"))
         
         hamster.transform.position.SetX(x)
         hamster.transform.position.SetY(y)
@@ -76,14 +114,17 @@ class World:
 
     def reset(self):
         self.scene_manager.clear()
+        self.sync_clock()
+        self.clock.reset()
+        self.hamster_serial = 0
         self.selected_object = None
         
         width, height = self.setting.field_size
         
         # Floor
-        tile = Object(name="Floor")
+        tile = Object(name="Floor", store=self.scene_manager.store, kind=KIND_FLOOR)
         tile.set_mesh(self.quad_mesh)
-        tile.set_material(self.materials["wood"])
+        tile.set_material(self.materials.get("wood"))
         tile.enable_collision_event = False
         tile.transform.scale.SetX(width)
         tile.transform.scale.SetY(height)
@@ -101,9 +142,9 @@ class World:
             
         # Cat
         for i in range(self.setting.cat_count):
-            cat = Object(name=f"Cat {i}")
+            cat = Object(name=f"Cat {i}", store=self.scene_manager.store, kind=KIND_CAT)
             cat.set_mesh(self.quad_mesh)
-            cat.set_material(self.materials["cat"])
+            cat.set_material(self.materials.get("cat"))
             
             # Random position (optional) or Fixed? 
             # Original was fixed at (0, 2.0). 
@@ -118,12 +159,138 @@ class World:
             cat.transform.scale.Set(0.5)
             cat.add_component(CatAIComponent(self))
             self.scene_manager.add_object(cat)
+
+        # Index the new population so spatial queries work on the first tick
+        self.scene_manager.rebuild_broadphase()
         
+    def set_shards(self, workers):
+        # Worker processes for the flee search and the "sharded" broadphase (0 = in process)
+        if self.shards is not None:
+            self.shards.close()
+        self.setting.shards = workers
+        self.shards = ShardPool(workers) if workers > 0 else None
+        self.flee.shards = self.shards
+        self.scene_manager.shards = self.shards
+        self.scene_manager.set_broadphase(self.setting.broadphase)
+
+    @property
+    def selected_object(self):
+        # None once the selected entity has left the scene (eaten, starved, reset)
+        return self.scene_manager.resolve(self.selected_handle)
+
+    @selected_object.setter
+    def selected_object(self, obj):
+        self.selected_handle = obj.handle if obj is not None else None
+
     def tick(self, dt):
         # Apply Time Scale
         scaled_dt = dt * self.setting.time_scale
         self.scene_manager.tick(scaled_dt)
 
+    def update(self, frame_dt):
+        # Runs as many fixed steps as the frame time (scaled) covers; returns the count
+        if self.scene_manager.is_paused:
+            self.clock.reset()
+            return 0
+        self.sync_clock()
+        steps = self.clock.advance(frame_dt * self.setting.time_scale)
+        for i in range(steps):
+            with self.lock:
+                if i == steps - 1:
+                    self.scene_manager.capture_previous()
+                self.scene_manager.tick(self.clock.step)
+        return steps
+
+    def sync_clock(self):
+        # Picks up tick_rate/max_substeps/catch_up changes made through WorldSetting
+        setting = self.setting
+        if not self.clock.matches(setting.tick_rate, setting.max_substeps, setting.catch_up):
+            self.clock.configure(setting.tick_rate, setting.max_substeps, setting.catch_up)
+
+    @property
+    def render_alpha(self):
+        # Interpolation factor for get_render_queue (None while paused: draw the current state)
+        return None if self.scene_manager.is_paused else self.clock.alpha
+
+    def capture_overlay(self, debug_shapes=False, hamster_bars=False):
+        """
+        Copies what the UI panels, status bars and debug lines show into plain
+        values and arrays, so the GL thread can draw them without the world
+        lock. Call under world.lock (SimulationThread.publish does).
+        """
+        scene_manager = self.scene_manager
+        store = scene_manager.store
+        broadphase = scene_manager.broadphase
+        overlay = {
+            "paused": scene_manager.is_paused,
+            "stats": dict(scene_manager.stats),
+            "aabb_checks": scene_manager.aabb_checks,
+            "potential_checks": scene_manager.potential_checks,
+            "broadphase": getattr(broadphase, "active_name", None) or broadphase.name,
+            "logs": scene_manager.logs.query(last=50), # Records are immutable; formatted when drawn
+            "inspector": None,
+            "selected_bounds": None,
+            "debug": None,
+            "hamster_bars": None,
+        }
+
+        # Cat satiety bars: anchor points and fill ratios
+        cats = []
+        for obj in scene_manager.objects_of(KIND_CAT):
+            ai = obj.get_component(CatAIComponent)
+            if ai:
+                cats.append((obj.transform.slot, ai.satiety / 100.0))
+        slots = np.array([slot for slot, _ in cats], dtype=np.intp)
+        overlay["cat_bars"] = (store.positions[slots].copy(), np.array([ratio for _, ratio in cats]))
+
+        if hamster_bars:
+            # Growth and mating cooldown; both timers run for 10 seconds (see HamsterAIComponent)
+            hamsters = []
+            for obj in scene_manager.objects_of(KIND_HAMSTER):
+                comp = obj.get_component(HamsterAIComponent)
+                if comp:
+                    growth = 0.0 if comp.is_adult else min(comp.growth_timer / 10.0, 1.0)
+                    cooldown = max(min(comp.repro_timer / 10.0, 1.0), 0.0)
+                    if growth or cooldown:
+                        hamsters.append((obj.transform.slot, growth, cooldown))
+            slots = np.array([entry[0] for entry in hamsters], dtype=np.intp)
+            overlay["hamster_bars"] = (store.positions[slots].copy(),
+                                       np.array([entry[1] for entry in hamsters]),
+                                       np.array([entry[2] for entry in hamsters]))
+
+        if debug_shapes:
+            store.refresh_bounds()
+            slots = store.slots_with(FLAG_IN_SCENE)
+            overlay["debug"] = (store.positions[slots, :2].copy(), store.radii[slots].copy(),
+                                store.world_bounds[slots].copy())
+
+        selected = self.selected_object
+        if selected is not None:
+            overlay["selected_bounds"] = selected.get_world_bounds()
+            overlay["inspector"] = self._inspect(selected)
+        return overlay
+
+    def _inspect(self, obj):
+        # Inspector fields of one object as plain values
+        info = {"name": obj.name, "texture_id": None, "uv_rect": None, "ai": None}
+        material = getattr(obj, "material", None)
+        if material and material.texture_id:
+            info["texture_id"] = material.texture_id
+            info["uv_rect"] = tuple(material.uv_rect)
+
+        ai = obj.get_component(BaseAIComponent)
+        if ai:
+            stats = {"is_moving": ai.is_moving, "move_speed": ai.move_speed,
+                     "move_duration": ai.move_duration, "rest_duration": ai.rest_duration}
+            if isinstance(ai, CatAIComponent):
+                stats.update(satiety=ai.satiety, hunger_rate=ai.hunger_rate)
+            if isinstance(ai, HamsterAIComponent):
+                stats.update(gender=ai.gender, is_adult=ai.is_adult, growth_timer=ai.growth_timer,
+                             repro_timer=ai.repro_timer, detection_radius=ai.detection_radius,
+                             repro_range=ai.repro_range)
+            info["ai"] = stats
+        return info
+
     def select_object(self, x, y, view_matrix, proj_matrix, viewport):
         if view_matrix is None or proj_matrix is None:
             return
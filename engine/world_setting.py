@@ -16,3 +16,8 @@ class WorldSetting:
         self.hamster_setting = UnitSetting(speed=2.0)
         self.hamster_count = 15
         self.cat_count = 1
+        self.broadphase = "auto" # "auto", "grid", "sap", "quadtree" or "sharded"
+        self.shards = 0 # Worker processes for sharded queries, see World.set_shards
+        self.tick_rate = 60.0 # Fixed simulation steps per (scaled) second
+        self.max_substeps = 10 # Per frame; covers time_scale 10 at a matching frame rate
+        self.catch_up = "drop" # "drop" or "carry" time beyond max_substeps
@@ -1,13 +1,32 @@
 from engine.component import Component
+from engine.entity_store import FLAG_MOVING, FLAG_PREY, FLAG_PREDATOR, FLAG_THREATENED, FLAG_HAS_MATE, FLAG_MATE_READY, FLAG_FEMALE, KIND_HAMSTER, SlotField
+from engine.movement_system import MovementSystem
+from game_objects.systems.flee_system import FleeSystem
+from game_objects.systems.mating_system import MatingSystem
 import random
 import math
 
 class BaseAIComponent(Component):
+    # Per-entity state lives in the scene's EntityStore once attached (see MovementSystem)
+    direction = SlotField("directions", default=(0, 0))
+    is_moving = SlotField(flag=FLAG_MOVING, default=False)
+    state_timer = SlotField("state_timers", default=0.0)
+    move_speed = SlotField("move_speeds")
+    move_duration = SlotField("move_durations")
+    rest_duration = SlotField("rest_durations")
+
+    # Set by subclasses that override steer() to pick their own heading while moving
+    steers = False
+
     def __init__(self, world):
         super().__init__()
+        self._store = None
+        self._slot = None
+
         self.world = world
         self.world_setting = world.setting
         self.scene_manager = world.scene_manager
+        self.in_scene = False # Between SceneManager add/remove; scene stats are counted while True
         
         # Copy stats from setting (Decoupling)
         setting = self.get_initial_setting()
@@ -23,6 +42,17 @@ class BaseAIComponent(Component):
         self.state_timer = self.move_duration
         self.randomize_direction()
 
+    def on_attach(self):
+        store = self.owner.transform.store
+        MovementSystem.register_fields(store)
+        SlotField.bind(self, store, self.owner.transform.slot)
+
+    def on_added(self):
+        self.in_scene = True
+
+    def on_removed(self):
+        self.in_scene = False
+
     def get_initial_setting(self):
         return None 
 
@@ -32,9 +62,19 @@ class BaseAIComponent(Component):
         angle = random.uniform(0, 6.28318)
         self.direction = (math.cos(angle), math.sin(angle))
 
+    def steer(self):
+        # Override (with steers = True) to change direction before moving
+        pass
+
     def tick(self, dt):
         if not self.owner:
             return
+
+        # Batched path: timers, movement and bounce run once for all agents
+        movement = self.scene_manager.system(MovementSystem) if self.scene_manager else None
+        if movement:
+            movement.submit(self)
+            return
             
         self.state_timer -= dt
         
@@ -92,182 +132,40 @@ class BaseAIComponent(Component):
             self.owner.transform.position.SetY(old_y + ndy * speed * dt)
 
 class CatAIComponent(BaseAIComponent):
-    def get_initial_setting(self):
-        return self.world_setting.cat_setting
-
-    def __init__(self, world):
-        super().__init__(world)
-        self.satiety = 50.0
-        # Cat specific stats
-        self.hunger_rate = self.get_initial_setting().hunger_rate if self.get_initial_setting() else 5.0
-
-    def feed(self, amount):
-        self.satiety += amount
-        if self.satiety > 100.0:
-            self.satiety = 100.0
-
-    def on_collision(self, other):
-        if "Hamster" in other.name:
-            if self.satiety < 90.0:
-                self.feed(25.0)
-                self.scene_manager.logs.append(f"{self.owner.name} ate {other.name}!")
-                self.scene_manager.remove_object(other)
-            #else:
-                #self.scene_manager.logs.append(f"{self.owner.name} is full (Satiety: {self.satiety:.1f}) and ignored {other.name}")
-        
-    def tick(self, dt):
-        # Hunger Logic
-        rate = self.hunger_rate
-        self.satiety -= rate * dt
-        if self.satiety < 0: 
-            self.satiety = 0
-            # Starvation Death
-            self.scene_manager.logs.append(f"{self.owner.name} starved to death!")
-            self.scene_manager.remove_object(self.owner)
-            return
-        
-        # Behavior Check
-        if self.satiety >= 60.0:
-            # Satiated - Stop hunting/moving
-            self.is_moving = False
-            # self.state_timer is for switching logic, we can leave it or pause it.
-            # To ensure it resumes, we can just return early or force is_moving=False
-            return
-            
-        super().tick(dt)
-        
-    def move(self, dt):
-        # Chase Logic override
-        # Find nearest Hamster
-        if self.scene_manager:
-            target = None
-            min_dist = 9999.0
-            
-            my_pos = (self.owner.transform.position.X(), self.owner.transform.position.Y())
-            
-            for obj in self.scene_manager.objects:
-                if "Hamster" in obj.name:
-                    ox = obj.transform.position.X()
-                    oy = obj.transform.position.Y()
-                    dist = math.sqrt((ox - my_pos[0])**2 + (oy - my_pos[1])**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        target = obj
-            
-            if target:
-                # Update direction towards target
-                tx = target.transform.position.X()
-                ty = target.transform.position.Y()
-                
-                dir_x = tx - my_pos[0]
-                dir_y = ty - my_pos[1]
-                length = math.sqrt(dir_x**2 + dir_y**2)
-                
-                if length > 0:
-                    self.direction = (dir_x/length, dir_y/length)
-        
-        # Call base move (which handles actual position update and bounds)
-        # But base move uses self.direction which we just updated
-from engine.component import Component
-import random
-import math
-
-class BaseAIComponent(Component):
-    def __init__(self, world):
-        super().__init__()
-        self.world = world
-        self.world_setting = world.setting
-        self.scene_manager = world.scene_manager
-        
-        # Copy stats from setting (Decoupling)
-        setting = self.get_initial_setting()
-        self.move_speed = setting.move_speed if setting else 1.0
-        self.move_duration = setting.move_duration if setting else 2.0
-        self.rest_duration = setting.rest_duration if setting else 2.0
-        
-        self.state_timer = 0.0
-        self.is_moving = False
-        self.direction = (0, 0)
-        # Defaults
-        self.is_moving = True
-        self.state_timer = self.move_duration
-        self.randomize_direction()
+    steers = True
 
     def get_initial_setting(self):
-        return None 
+        return self.world_setting.cat_setting
 
-    # Removed get_speed, get_move_duration etc to use instance vars directly
-    
-    def randomize_direction(self):
-        angle = random.uniform(0, 6.28318)
-        self.direction = (math.cos(angle), math.sin(angle))
+    def on_attach(self):
+        super().on_attach()
+        self._store.set_flag(self._slot, FLAG_PREDATOR, True)
 
-    def tick(self, dt):
-        if not self.owner:
-            return
-            
-        self.state_timer -= dt
-        
-        # State Transition
-        if self.state_timer <= 0:
-            self.is_moving = not self.is_moving
-            if self.is_moving:
-                self.state_timer = self.move_duration
-                self.randomize_direction()
-            else:
-                self.state_timer = self.rest_duration
-        
-        # Move Logic
-        if self.is_moving:
-            self.move(dt)
+    def on_added(self):
+        super().on_added()
+        self.scene_manager.add_stat("cats", 1)
+        self.scene_manager.add_stat("cat_satiety", self._satiety)
 
-    def move(self, dt):
-        dx, dy = self.direction
-        current_x = self.owner.transform.position.X()
-        current_y = self.owner.transform.position.Y()
-        speed = self.move_speed
-        
-        step_x = dx * speed * dt
-        step_y = dy * speed * dt
-        
-        # Apply Move
-        self.owner.transform.position.SetX(current_x + step_x)
-        self.owner.transform.position.SetY(current_y + step_y)
-        
-        # Boundary Check
-        self.check_boundary(current_x, current_y, dx, dy, speed, dt)
+    def on_removed(self):
+        if self.in_scene:
+            self.scene_manager.add_stat("cats", -1)
+            self.scene_manager.add_stat("cat_satiety", -self._satiety)
+        super().on_removed()
 
-    def check_boundary(self, old_x, old_y, dx, dy, speed, dt):
-        min_x, min_y, max_x, max_y = self.owner.get_world_bounds()
-        field_w, field_h = self.world_setting.field_size
-        half_w = field_w / 2.0
-        half_h = field_h / 2.0
-        
-        collision = False
-        if min_x < -half_w or max_x > half_w:
-            self.direction = (-dx, dy)
-            collision = True
-        if min_y < -half_h or max_y > half_h:
-            # Re-fetch in case X flip changed it
-            cdx, cdy = self.direction
-            self.direction = (cdx, -dy)
-            collision = True
-            
-        if collision:
-            self.owner.transform.position.SetX(old_x)
-            self.owner.transform.position.SetY(old_y)
-            # Step with new direction
-            ndx, ndy = self.direction
-            self.owner.transform.position.SetX(old_x + ndx * speed * dt)
-            self.owner.transform.position.SetY(old_y + ndy * speed * dt)
+    @property
+    def satiety(self):
+        return self._satiety
 
-class CatAIComponent(BaseAIComponent):
-    def get_initial_setting(self):
-        return self.world_setting.cat_setting
+    @satiety.setter
+    def satiety(self, value):
+        # Keep the scene's satiety sum (for the average) in step
+        if self.in_scene:
+            self.scene_manager.add_stat("cat_satiety", value - self._satiety)
+        self._satiety = value
 
     def __init__(self, world):
         super().__init__(world)
-        self.satiety = 50.0
+        self._satiety = 50.0
         # Cat specific stats
         self.hunger_rate = self.get_initial_setting().hunger_rate if self.get_initial_setting() else 5.0
 
@@ -277,13 +175,13 @@ class CatAIComponent(BaseAIComponent):
             self.satiety = 100.0
 
     def on_collision(self, other):
-        if "Hamster" in other.name:
+        if other.kind & KIND_HAMSTER:
             if self.satiety < 90.0:
                 self.feed(25.0)
-                self.scene_manager.logs.append(f"{self.owner.name} ate {other.name}!")
+                self.scene_manager.logs.log("predation", "{} ate {}!", self.owner.name, other.name, handles=(self.owner.handle, other.handle))
                 self.scene_manager.remove_object(other)
             #else:
-                #self.scene_manager.logs.append(f"{self.owner.name} is full (Satiety: {self.satiety:.1f}) and ignored {other.name}")
+                #self.scene_manager.logs.log("predation", "{} is full (Satiety: {:.1f}) and ignored {}", self.owner.name, self.satiety, other.name, level=DEBUG)
         
     def tick(self, dt):
         # Hunger Logic
@@ -292,7 +190,7 @@ class CatAIComponent(BaseAIComponent):
         if self.satiety < 0: 
             self.satiety = 0
             # Starvation Death
-            self.scene_manager.logs.append(f"{self.owner.name} starved to death!")
+            self.scene_manager.logs.log("death", "{} starved to death!", self.owner.name, handles=(self.owner.handle,))
             self.scene_manager.remove_object(self.owner)
             return
         
@@ -306,26 +204,16 @@ class CatAIComponent(BaseAIComponent):
             
         super().tick(dt)
         
-    def move(self, dt):
-        # Chase Logic override
-        # Find nearest Hamster
+    def steer(self):
+        # Chase Logic
+        # Nearest Hamster via the scene's broadphase (ring-by-ring on the grid)
         if self.scene_manager:
-            target = None
-            min_dist = 9999.0
-            
             my_pos = (self.owner.transform.position.X(), self.owner.transform.position.Y())
+            hits = self.scene_manager.nearest(my_pos[0], my_pos[1], k=1, kind=FLAG_PREY)
             
-            for obj in self.scene_manager.objects:
-                if "Hamster" in obj.name:
-                    ox = obj.transform.position.X()
-                    oy = obj.transform.position.Y()
-                    dist = math.sqrt((ox - my_pos[0])**2 + (oy - my_pos[1])**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        target = obj
-            
-            if target:
+            if hits:
                 # Update direction towards target
+                target = hits[0]
                 tx = target.transform.position.X()
                 ty = target.transform.position.Y()
                 
@@ -335,14 +223,63 @@ class CatAIComponent(BaseAIComponent):
                 
                 if length > 0:
                     self.direction = (dir_x/length, dir_y/length)
-        
-        # Call base move (which handles actual position update and bounds)
-        # But base move uses self.direction which we just updated
+
+    def move(self, dt):
+        # Point at prey first; base move (position update and bounds) then uses the new direction
+        self.steer()
         super().move(dt)
 
 class HamsterAIComponent(BaseAIComponent):
+    detection_radius = SlotField("detection_radii")
+    threatened = SlotField(flag=FLAG_THREATENED, default=False)
+    threat_position = SlotField("threat_positions", default=(0, 0))
+    repro_range = SlotField("repro_ranges")
+    has_mate = SlotField(flag=FLAG_HAS_MATE, default=False)
+    mate_position = SlotField("mate_positions", default=(0, 0))
+
     def get_initial_setting(self):
         return self.world_setting.hamster_setting
+
+    def on_attach(self):
+        FleeSystem.register_fields(self.owner.transform.store)
+        MatingSystem.register_fields(self.owner.transform.store)
+        super().on_attach()
+        self._store.set_flag(self._slot, FLAG_PREY, True)
+        self.refresh_ready()
+
+    def on_added(self):
+        super().on_added()
+        self.scene_manager.add_stat(self.population_stat(), 1)
+
+    def on_removed(self):
+        self.world.mating.set_ready(self._slot, self.gender, False)
+        self._ready = False
+        if self.in_scene:
+            self.scene_manager.add_stat(self.population_stat(), -1)
+        super().on_removed()
+
+    def population_stat(self):
+        return "adult_hamsters" if self._is_adult else "baby_hamsters"
+
+    @property
+    def is_adult(self):
+        return self._is_adult
+
+    @is_adult.setter
+    def is_adult(self, value):
+        # Move this hamster between the adult/baby counters when it grows up
+        if self.in_scene and value != self._is_adult:
+            self.scene_manager.add_stat(self.population_stat(), -1)
+            self._is_adult = value
+            self.scene_manager.add_stat(self.population_stat(), 1)
+        self._is_adult = value
+
+    def refresh_ready(self):
+        # Keep MatingSystem's ready index in sync; call whenever adult/cooldown state changes
+        ready = self.is_adult and self.repro_timer <= 0
+        if ready != self._ready:
+            self._ready = ready
+            self.world.mating.set_ready(self._slot, self.gender, ready)
     
     def __init__(self, world):
         super().__init__(world)
@@ -350,11 +287,12 @@ class HamsterAIComponent(BaseAIComponent):
         
         # Reproduction Stats
         self.gender = random.randint(0, 1) # 0: Male, 1: Female
-        self.is_adult = True
+        self._is_adult = True
         self.growth_timer = 0.0
         self.repro_timer = 0.0
         self.repro_range = self.get_initial_setting().mating_search_range if self.get_initial_setting() else 3.0
         self.scale_ref = 0.25 # Full size scale
+        self._ready = False
 
     def tick(self, dt):
         # 1. Growth Logic
@@ -363,70 +301,38 @@ class HamsterAIComponent(BaseAIComponent):
             if self.growth_timer >= 10.0:
                 self.is_adult = True
                 self.owner.transform.scale.Set(self.scale_ref)
-                self.scene_manager.logs.append(f"{self.owner.name} grew up!")
+                self.scene_manager.logs.log("growth", "{} grew up!", self.owner.name, handles=(self.owner.handle,))
+                self.refresh_ready()
         
         # 2. Cooldown Logic
         if self.repro_timer > 0:
             self.repro_timer -= dt
+            if self.repro_timer <= 0:
+                self.refresh_ready()
 
         # 3. Flee Logic (Highest Priority)
+        # Nearest cat in range is found for all hamsters at once by FleeSystem
         detecting_cat = False
-        if self.scene_manager:
-            my_pos = (self.owner.transform.position.X(), self.owner.transform.position.Y())
-            detection_range = self.detection_radius
-            
-            cats = [o for o in self.scene_manager.objects if "Cat" in o.name]
-            nearest_cat = None
-            min_dist = 9999.0
-            
-            for cat in cats:
-                cx = cat.transform.position.X()
-                cy = cat.transform.position.Y()
-                dist_sq = (cx - my_pos[0])**2 + (cy - my_pos[1])**2
-                
-                if dist_sq < detection_range * detection_range:
-                    if dist_sq < min_dist:
-                        min_dist = dist_sq
-                        nearest_cat = cat
-                        
-            if nearest_cat:
-                detecting_cat = True
-                cx = nearest_cat.transform.position.X()
-                cy = nearest_cat.transform.position.Y()
-                dx = my_pos[0] - cx
-                dy = my_pos[1] - cy
-                length = math.sqrt(dx*dx + dy*dy)
-                if length > 0.001:
-                     self.direction = (dx/length, dy/length)
-                     self.is_moving = True
+        my_pos = (self.owner.transform.position.X(), self.owner.transform.position.Y())
+        if self.threatened:
+            detecting_cat = True
+            cx, cy = self.threat_position
+            dx = my_pos[0] - cx
+            dy = my_pos[1] - cy
+            length = math.sqrt(dx*dx + dy*dy)
+            if length > 0.001:
+                 self.direction = (dx/length, dy/length)
+                 self.is_moving = True
                      # Reset state timer to keep running for a bit? 
                      # Or just frame-by-frame override? Frame-by-frame is more responsive.
                      
         # 4. Mating Logic (If not fleeing and is adult)
         if not detecting_cat and self.is_adult and self.repro_timer <= 0:
             if self.gender == 0: # Male
-                # Search for Waiting Female
-                target_female = None
-                closest_f_dist = self.repro_range
-                
-                # Check neighbors or all? All hamsters.
-                # Since we accept world, we can filter or use scene_manager
-                for obj in self.scene_manager.objects:
-                    if "Hamster" in obj.name and obj != self.owner:
-                        comp = obj.get_component(HamsterAIComponent)
-                        if comp and comp.gender == 1 and comp.is_adult and comp.repro_timer <= 0:
-                             # Found ready female
-                             fx = obj.transform.position.X()
-                             fy = obj.transform.position.Y()
-                             dist = math.sqrt((fx - my_pos[0])**2 + (fy - my_pos[1])**2)
-                             if dist < closest_f_dist:
-                                 closest_f_dist = dist
-                                 target_female = obj
-                
-                if target_female:
+                # Nearest ready female in range is matched for all males by MatingSystem
+                if self.has_mate:
                     # Move towards her
-                    tx = target_female.transform.position.X()
-                    ty = target_female.transform.position.Y()
+                    tx, ty = self.mate_position
                     dx = tx - my_pos[0]
                     dy = ty - my_pos[1]
                     l = math.sqrt(dx*dx + dy*dy)
@@ -442,7 +348,7 @@ class HamsterAIComponent(BaseAIComponent):
 
     def on_collision(self, other):
         # Mating Contact
-        if self.gender == 0 and "Hamster" in other.name: # Male logic driver
+        if self.gender == 0 and other.kind & KIND_HAMSTER: # Male logic driver
             comp = other.get_component(HamsterAIComponent)
             if comp and comp.gender == 1: # Female
                 # Check availability
@@ -450,9 +356,40 @@ class HamsterAIComponent(BaseAIComponent):
                     # Reproduce
                     self.repro_timer = 10.0
                     comp.repro_timer = 10.0
+                    self.refresh_ready()
+                    comp.refresh_ready()
                     
                     # Spawn Baby at Female's location
                     sx = other.transform.position.X()
                     sy = other.transform.position.Y()
                     self.world.spawn_hamster(sx, sy, is_baby=True)
-                    self.scene_manager.logs.append("New baby born!")
+                    self.scene_manager.logs.log("birth", "New baby born!", handles=(self.owner.handle, other.handle))
+
+
+# Batched collision handlers (see SceneManager.subscribe)
+def on_cat_hamster_collisions(batch):
+    # Side a is always the cat
+    for cat, hamster in batch.live_pairs():
+        ai = cat.get_component(CatAIComponent)
+        if ai:
+            ai.on_collision(hamster)
+
+def on_hamster_collisions(batch):
+    # Only a ready male meeting a ready female can lead anywhere: filter with the
+    # store flags first, then resolve objects for the few pairs left; the male drives
+    flags = batch.scene_manager.store.flags
+    flags_a = flags[batch.slots_a]
+    flags_b = flags[batch.slots_b]
+    candidates = ((flags_a & flags_b & FLAG_MATE_READY) != 0) & (((flags_a ^ flags_b) & FLAG_FEMALE) != 0)
+    if not candidates.any():
+        return
+
+    for first, second in batch.select(candidates).live_pairs():
+        ai_first = first.get_component(HamsterAIComponent)
+        ai_second = second.get_component(HamsterAIComponent)
+        if ai_first is None or ai_second is None:
+            continue
+        if ai_first.gender == 0:
+            ai_first.on_collision(second)
+        else:
+            ai_second.on_collision(first)
@@ -1,88 +1,104 @@
+import numpy as np
 from engine.transform import Transform
-from OpenGL.GL import *
+from engine.entity_store import FLAG_COLLIDABLE, FLAG_BOUNDS_DIRTY, KIND_MASK
 
 class Object:
-    def __init__(self, name="Object"):
+    def __init__(self, name="Object", store=None, kind=0):
         self.name = name
         self.is_selected = False
+        self.handle = None # Generational handle while in a SceneManager (see EntityRegistry)
+        self.transform = Transform(store=store)
+        self.kind = kind
         self.enable_collision_event = True
-        self.transform = Transform()
         self.mesh = None
         self.material = None
         self.material = None
         self.material = None
         self.uv_scale = (1.0, 1.0)
         self.components = []
+        self.component_lookup = {} # Component class (and each base class) -> first component of that class
         self.local_bounds = ((-0.5, -0.5, 0), (0.5, 0.5, 0)) # Default/Fallback
 
+    @property
+    def local_bounds(self):
+        return self._local_bounds
+
+    @local_bounds.setter
+    def local_bounds(self, value):
+        self._local_bounds = value
+        min_p, max_p = value
+        self.transform.store.local_sizes[self.transform.slot] = (max_p[0] - min_p[0], max_p[1] - min_p[1])
+        self.transform.store.set_flag(self.transform.slot, FLAG_BOUNDS_DIRTY, True)
+
+    @property
+    def kind(self):
+        # KIND_* bitmask; set it before adding the object to a SceneManager (indexed on add)
+        return int(self.transform.store.flags[self.transform.slot] & KIND_MASK)
+
+    @kind.setter
+    def kind(self, value):
+        store = self.transform.store
+        slot = self.transform.slot
+        store.flags[slot] = (store.flags[slot] & ~np.uint32(KIND_MASK)) | np.uint32(value & KIND_MASK)
+
+    @property
+    def enable_collision_event(self):
+        return self.transform.store.has_flag(self.transform.slot, FLAG_COLLIDABLE)
+
+    @enable_collision_event.setter
+    def enable_collision_event(self, value):
+        self.transform.store.set_flag(self.transform.slot, FLAG_COLLIDABLE, value)
+
     def set_mesh(self, mesh):
         self.mesh = mesh
         if mesh:
             self.local_bounds = (mesh.min_point, mesh.max_point)
 
+    def _cached_slot(self):
+        # Slot with up to date world_bounds/radii (recomputed only after a transform change)
+        store = self.transform.store
+        slot = self.transform.slot
+        if store.flags[slot] & FLAG_BOUNDS_DIRTY:
+            store.refresh_bounds([slot])
+        return store, slot
+
     def get_world_bounds(self):
-        # Assumes scaling is uniform or handled simply for AABB
-        # Center = Position
-        pos = self.transform.position
-        scale = self.transform.scale
-        
-        min_p = self.local_bounds[0]
-        max_p = self.local_bounds[1]
-        
-        # Calculate Half Extents scaled
-        half_w = (max_p[0] - min_p[0]) * scale.X() / 2.0
-        half_h = (max_p[1] - min_p[1]) * scale.Y() / 2.0
-        
-        # Center is at Position (Assuming Pivot is Center)
-        min_x = pos.X() - half_w
-        max_x = pos.X() + half_w
-        min_y = pos.Y() - half_h
-        max_y = pos.Y() + half_h
-        
-        min_y = pos.Y() - half_h
-        max_y = pos.Y() + half_h
-        
-        return (min_x, min_y, max_x, max_y)
+        # (min_x, min_y, max_x, max_y); center = position, half extents = local size * scale / 2
+        store, slot = self._cached_slot()
+        return tuple(store.world_bounds[slot].tolist())
 
     def get_world_radius(self):
-        scale = self.transform.scale
-        min_p = self.local_bounds[0]
-        max_p = self.local_bounds[1]
-        
-        # Calculate Half Extents scaled
-        half_w = (max_p[0] - min_p[0]) * scale.X() / 2.0
-        half_h = (max_p[1] - min_p[1]) * scale.Y() / 2.0
-        
-        # Radius is distance from center to corner
-        return (half_w**2 + half_h**2)**0.5
+        # Distance from center to corner
+        store, slot = self._cached_slot()
+        return float(store.radii[slot])
 
     def set_material(self, material):
+        # Set mesh, material and uv_scale before adding the object to a SceneManager
+        # (its render group is indexed on add)
         self.material = material
 
     def add_component(self, component):
+        # Add components before the object enters a SceneManager (indexed on add)
         component.owner = self
         self.components.append(component)
+        for cls in type(component).__mro__[:-1]:
+            self.component_lookup.setdefault(cls, component)
+        component.on_attach()
 
     def get_component(self, component_type):
-        for c in self.components:
-            if isinstance(c, component_type):
-                return c
-        return None
+        return self.component_lookup.get(component_type)
+
+    def on_added(self):
+        # Called by SceneManager after the object enters the scene
+        for component in self.components:
+            if hasattr(component, "on_added"):
+                component.on_added()
 
-    def tick(self, dt):
+    def on_removed(self):
+        # Called by SceneManager after the object leaves the scene
         for component in self.components:
-            component.tick(dt)
-
-    def get_render_data(self):
-        if not self.mesh or not self.material:
-            return None
-            
-        return {
-            "mesh": self.mesh,
-            "material": self.material,
-            "matrix": self.transform.get_model_matrix(),
-            "uv_scale": self.uv_scale
-        }
+            if hasattr(component, "on_removed"):
+                component.on_removed()
 
     def on_collision(self, other):
         for component in self.components:
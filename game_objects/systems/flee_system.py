@@ -0,0 +1,68 @@
+import numpy as np
+from engine.component import ComponentSystem
+from engine.entity_store import FLAG_IN_SCENE, FLAG_PREY, FLAG_PREDATOR, FLAG_THREATENED
+
+class FleeSystem(ComponentSystem):
+    """
+    Batched predator detection.
+
+    Once per tick, finds for every prey the nearest predator inside its own
+    detection radius. Results are written to the EntityStore (FLAG_THREATENED and
+    threat_positions) so each HamsterAIComponent only reads its own row.
+    With a ShardPool the search runs on x strips in worker processes.
+    Register it before SceneManager.component_system.
+    """
+    component_type = None # Reads prey/predator flags from the store
+    # Prey per distance-matrix chunk, bounds temporary memory at (chunk x predators)
+    chunk_size = 4096
+
+    def __init__(self, store, shards=None):
+        self.store = store
+        self.shards = shards
+        self.register_fields(store)
+
+    @staticmethod
+    def register_fields(store):
+        store.add_field("detection_radii", 0, np.float32, 1.5)
+        store.add_field("threat_positions", 2, np.float32, 0.0)
+
+    def tick(self, components, dt):
+        store = self.store
+        prey = store.slots_with(FLAG_PREY | FLAG_IN_SCENE)
+        if not len(prey):
+            return
+
+        flags = store.flags
+        flags[prey] &= ~np.uint32(FLAG_THREATENED)
+
+        predators = store.slots_with(FLAG_PREDATOR | FLAG_IN_SCENE)
+        if not len(predators):
+            return
+
+        predator_pos = store.positions[predators, :2]
+
+        if self.shards is not None:
+            nearest = self.shards.nearest_threats(store.positions[prey, :2], store.detection_radii[prey],
+                                                  predator_pos, self.chunk_size)
+            detected = nearest >= 0
+            threatened = prey[detected]
+            flags[threatened] |= FLAG_THREATENED
+            store.threat_positions[threatened] = predator_pos[nearest[detected]]
+            return
+
+        for start in range(0, len(prey), self.chunk_size):
+            chunk = prey[start:start + self.chunk_size]
+            pos = store.positions[chunk, :2]
+            radii = store.detection_radii[chunk]
+
+            # (chunk, predators) squared distances
+            delta = pos[:, None, :] - predator_pos[None, :, :]
+            dist_sq = np.einsum("ijk,ijk->ij", delta, delta)
+
+            nearest = np.argmin(dist_sq, axis=1)
+            nearest_sq = dist_sq[np.arange(len(chunk)), nearest]
+            detected = nearest_sq < radii * radii
+
+            threatened = chunk[detected]
+            flags[threatened] |= FLAG_THREATENED
+            store.threat_positions[threatened] = predator_pos[nearest[detected]]
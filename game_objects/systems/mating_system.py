@@ -0,0 +1,110 @@
+import numpy as np
+from engine.component import ComponentSystem
+from engine.array_utils import expand_ranges, cell_keys
+from engine.entity_store import FLAG_IN_SCENE, FLAG_HAS_MATE, FLAG_MATE_READY, FLAG_FEMALE
+
+class MatingSystem(ComponentSystem):
+    """
+    Batched mate matching for hamsters.
+
+    Keeps an index of ready hamsters (adult, cooldown expired) per gender, updated
+    by HamsterAIComponent only when that state changes. Once per tick every ready
+    male is matched to the nearest ready female within his repro range using a
+    grid over female positions (cell = largest range, so a 3x3 block covers it).
+    Results go to FLAG_HAS_MATE and mate_positions in the EntityStore.
+    Register it before SceneManager.component_system.
+    """
+    component_type = None # Works from its ready index
+    def __init__(self, store):
+        self.store = store
+        self.ready_males = set()
+        self.ready_females = set()
+        self.register_fields(store)
+
+    @staticmethod
+    def register_fields(store):
+        store.add_field("repro_ranges", 0, np.float32, 3.0)
+        store.add_field("mate_positions", 2, np.float32, 0.0)
+
+    def set_ready(self, slot, gender, ready):
+        index = self.ready_females if gender == 1 else self.ready_males
+        if ready:
+            index.add(slot)
+        else:
+            index.discard(slot)
+        # Mirrored in the store so collision handlers can filter pairs with arrays
+        self.store.set_flag(slot, FLAG_MATE_READY, ready)
+        self.store.set_flag(slot, FLAG_FEMALE, gender == 1)
+        # Any previous match is stale once readiness changes
+        self.store.set_flag(slot, FLAG_HAS_MATE, False)
+
+    def clear(self):
+        self.ready_males.clear()
+        self.ready_females.clear()
+
+    def _in_scene(self, index):
+        slots = np.fromiter(index, dtype=np.intp, count=len(index))
+        return slots[(self.store.flags[slots] & FLAG_IN_SCENE) != 0]
+
+    def tick(self, components, dt):
+        store = self.store
+        males = self._in_scene(self.ready_males)
+        if not len(males):
+            return
+        store.flags[males] &= ~np.uint32(FLAG_HAS_MATE)
+
+        females = self._in_scene(self.ready_females)
+        if not len(females):
+            return
+
+        ranges = store.repro_ranges[males]
+        cell_size = float(ranges.max())
+        if cell_size <= 0:
+            return
+
+        # Bin females by cell, sorted so each cell is a contiguous run
+        female_pos = store.positions[females, :2]
+        female_cells = np.floor(female_pos / cell_size).astype(np.int64)
+        keys = cell_keys(female_cells[:, 0], female_cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        female_pos = female_pos[order]
+        females = females[order]
+
+        # Ranges of candidate females in the 3x3 cells around each male
+        male_pos = store.positions[males, :2]
+        male_cells = np.floor(male_pos / cell_size).astype(np.int64)
+        starts = []
+        ends = []
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                neighbor = cell_keys(male_cells[:, 0] + ox, male_cells[:, 1] + oy)
+                starts.append(np.searchsorted(keys, neighbor, side="left"))
+                ends.append(np.searchsorted(keys, neighbor, side="right"))
+        starts = np.concatenate(starts)
+        ends = np.concatenate(ends)
+
+        owner, candidate = expand_ranges(starts, ends)
+        if not len(owner):
+            return
+        male_idx = owner % len(males)
+
+        delta = female_pos[candidate] - male_pos[male_idx]
+        dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        in_range = dist < ranges[male_idx]
+        male_idx = male_idx[in_range]
+        candidate = candidate[in_range]
+        dist = dist[in_range]
+        if not len(male_idx):
+            return
+
+        # Closest candidate per male: sort by (male, distance), keep first of each run
+        order = np.lexsort((dist, male_idx))
+        male_idx = male_idx[order]
+        candidate = candidate[order]
+        first = np.ones(len(male_idx), dtype=bool)
+        first[1:] = male_idx[1:] != male_idx[:-1]
+
+        matched = males[male_idx[first]]
+        store.flags[matched] |= FLAG_HAS_MATE
+        store.mate_positions[matched] = female_pos[candidate[first]]
@@ -6,6 +6,7 @@ import numpy as np
 import imgui
 from engine.renderer import Renderer
 from engine.world import World
+from engine.simulation_thread import SimulationThread
 from utils.imgui_adapter import ImGuiAdapter
 import time
 
@@ -13,6 +14,7 @@ import time
 world = None
 renderer = None
 gui_adapter = None
+simulation = None # Runs world updates off the GLUT thread
 
 # Metrics
 last_time = 0
@@ -26,7 +28,7 @@ current_view_matrix = None
 current_proj_matrix = None
 
 def init():
-    global world, renderer, gui_adapter, last_time, last_calc_time, current_sps
+    global world, renderer, gui_adapter, simulation, last_time, last_calc_time, current_sps
     
     glClearColor(0.2, 0.3, 0.3, 1.0)
     glEnable(GL_BLEND)
@@ -41,7 +43,9 @@ def init():
     world.load_assets()
     world.reset()
     
-    renderer = Renderer()
+    renderer = Renderer(world.resources)
+    simulation = SimulationThread(world, renderer)
+    simulation.start()
 
     last_time = time.time()
     last_calc_time = time.time()
@@ -85,8 +89,9 @@ def mouse(button, state, x, y):
     if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
          # Raycast Selection delegate to World
          viewport = glGetIntegerv(GL_VIEWPORT)
-         if world:
-             world.select_object(x, y, current_view_matrix, current_proj_matrix, viewport)
+         # Runs on the simulation thread; the selection shows up in the next snapshot
+         if world and simulation:
+             simulation.post(world.select_object, x, y, current_view_matrix, current_proj_matrix, viewport)
 
     if gui_adapter:
         gui_adapter.mouse(button, state, x, y)
@@ -135,20 +140,10 @@ def mouse_wheel(wheel, direction, x, y):
         cam.ortho_size = new_size
 
 def display():
-    global last_time, current_view_matrix, current_proj_matrix
+    global current_view_matrix, current_proj_matrix
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     
-    # Calculate Delta Time
-    current_time = time.time()
-    dt = current_time - last_time
-    last_time = current_time
-    
-    # Sync Game Logic
-    if world:
-        world.tick(dt)
-        queue = world.scene_manager.get_render_queue()
-        if renderer:
-            renderer.submit_queue(queue)
+    # Game logic runs on the simulation thread, which submits render snapshots
     
     # Get Camera Matrices from World
     view = np.identity(4)
@@ -168,32 +163,40 @@ def display():
     # Render Scene
     if renderer:
         renderer.render(view, projection)
+
+    # UI and overlays read the snapshot's overlay, never the live world (no world.lock here)
+    snapshot = renderer.latest() if renderer else None
+    overlay = getattr(snapshot, "overlay", None)
     
     # Render UI
     if gui_adapter:
         gui_adapter.new_frame()
         
         from ui.game_ui import render_ui, render_status_bars
-        # Pass world components to UI
+        # UI changes go through the command channel
         reset_req = render_ui(gui_adapter.width, gui_adapter.height, 
                               world.scene_manager if world else None, 
                               world.setting if world else None, 
                               renderer, 
-                              world.selected_object if world else None)
+                              overlay,
+                              post=simulation.post if simulation else None)
         
         # Render Overlays (HP Bars)
-        if world:
-             viewport = glGetIntegerv(GL_VIEWPORT)
-             render_status_bars(world.scene_manager, current_view_matrix, current_proj_matrix, viewport)
+        viewport = glGetIntegerv(GL_VIEWPORT)
+        render_status_bars(overlay, current_view_matrix, current_proj_matrix, viewport,
+                           show_hamsters=renderer.show_hamster_bars if renderer else False)
 
         if reset_req and world:
-            world.reset()
+            if simulation:
+                simulation.post(world.reset)
+            else:
+                world.reset()
         
         gui_adapter.render()
         
     # Debug Render
-    if renderer and world:
-        renderer.render_debug(world.scene_manager, view, projection)
+    if renderer:
+        renderer.render_debug(overlay, view, projection)
     
     glutSwapBuffers()
     glutPostRedisplay()
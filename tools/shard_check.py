@@ -0,0 +1,127 @@
+"""
+Equivalence check for the sharded spatial queries.
+
+Runs ShardPool and ShardedBroadphase on random scenes for several worker
+counts and compares them with brute force and with the in-process backend:
+the candidate pair set, the exact pair order of SweepAndPrune, and the
+nearest-threat indices (including ties). Exits with status 1 on a mismatch.
+
+    python -m tools.shard_check --trials 20 --count 500 --workers 1 2 3 4
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from engine.entity_store import EntityStore, FLAG_COLLIDABLE, FLAG_IN_SCENE
+from engine.shard_pool import ShardPool
+from engine.sharded_broadphase import ShardedBroadphase
+from engine.sweep_and_prune import SweepAndPrune
+
+
+def random_store(count, field, rng):
+    # Collidable entities spread over the field; half the positions snap to a
+    # coarse grid so that equal min x (sort ties) and touching edges occur
+    store = EntityStore(count)
+    positions = rng.uniform(-field / 2, field / 2, size=(count, 2))
+    snapped = rng.random(count) < 0.5
+    positions[snapped] = np.round(positions[snapped] * 2.0) / 2.0
+    for i in range(count):
+        slot = store.allocate()
+        store.positions[slot, :2] = positions[i]
+        store.scales[slot, :2] = rng.choice((0.25, 0.5, 1.0))
+        store.flags[slot] |= np.uint32(FLAG_COLLIDABLE | FLAG_IN_SCENE)
+    return store
+
+
+def brute_pairs(bounds):
+    # Every overlapping (inclusive) pair i < j, as a set
+    b = bounds.astype(np.float64)
+    hit = ((b[:, None, 0] <= b[None, :, 2]) & (b[None, :, 0] <= b[:, None, 2]) &
+           (b[:, None, 1] <= b[None, :, 3]) & (b[None, :, 1] <= b[:, None, 3]))
+    first, second = np.nonzero(np.triu(hit, k=1))
+    return set(zip(first.tolist(), second.tolist()))
+
+
+def brute_threats(prey_pos, prey_radii, predator_pos):
+    # Nearest predator inside each prey's radius (first index on ties), else -1
+    delta = prey_pos[:, None, :] - predator_pos[None, :, :]
+    dist_sq = np.einsum("ijk,ijk->ij", delta, delta)
+    nearest = np.argmin(dist_sq, axis=1)
+    detected = dist_sq[np.arange(len(prey_pos)), nearest] < prey_radii * prey_radii
+    return np.where(detected, nearest, -1)
+
+
+def check_pairs(pool, store):
+    # Pool pair set == brute force, each pair once
+    sap = SweepAndPrune(store)
+    sap.update()
+    first, second = pool.candidate_pairs(sap.bounds)
+    found = list(zip(np.minimum(first, second).tolist(), np.maximum(first, second).tolist()))
+    if len(found) != len(set(found)):
+        return "duplicate pairs"
+    if set(found) != brute_pairs(sap.bounds):
+        return "pair set differs from brute force"
+    return None
+
+
+def check_order(pool, store):
+    # Sharded pairs == in-process sort-and-sweep pairs, element for element
+    sap = SweepAndPrune(store)
+    sap.update()
+    sharded = ShardedBroadphase(store, pool)
+    sharded.update()
+    expected = sap.candidate_pairs()
+    actual = sharded.candidate_pairs()
+    if not (np.array_equal(expected[0], actual[0]) and np.array_equal(expected[1], actual[1])):
+        return "pair order differs from SweepAndPrune"
+    return None
+
+
+def check_threats(pool, store, rng):
+    slots = store.live_slots()
+    predators = rng.random(len(slots)) < 0.1
+    prey_pos = store.positions[slots[~predators], :2]
+    predator_pos = store.positions[slots[predators], :2]
+    if not len(prey_pos) or not len(predator_pos):
+        return None
+    prey_radii = rng.choice((0.5, 1.5, 3.0), size=len(prey_pos)).astype(np.float32)
+    expected = brute_threats(prey_pos, prey_radii, predator_pos)
+    actual = pool.nearest_threats(prey_pos, prey_radii, predator_pos, chunk_size=64)
+    if not np.array_equal(expected, actual):
+        return "nearest threats differ from brute force"
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check sharded spatial queries against brute force and the in-process backend.")
+    parser.add_argument("--trials", type=int, default=10, help="Random scenes per worker count")
+    parser.add_argument("--count", type=int, default=400, help="Entities per scene")
+    parser.add_argument("--field", type=float, default=20.0, help="Field width and height")
+    parser.add_argument("--workers", type=int, nargs="+", default=(1, 2, 3, 4), help="Worker counts to check")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    failures = 0
+    for workers in args.workers:
+        pool = ShardPool(workers)
+        try:
+            for trial in range(args.trials):
+                store = random_store(args.count, args.field, rng)
+                for check in (check_pairs(pool, store), check_order(pool, store), check_threats(pool, store, rng)):
+                    if check:
+                        failures += 1
+                        print(f"workers {workers}, trial {trial}: {check}")
+        finally:
+            pool.close()
+        print(f"workers {workers}: {args.trials} scenes checked")
+    print("OK" if not failures else f"{failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
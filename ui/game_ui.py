@@ -1,9 +1,25 @@
 import imgui
-from OpenGL.GLU import gluProject
 import numpy as np
-from game_objects.components.ai_component import CatAIComponent
+from engine.camera import world_to_screen
+from engine.event_log import format_record
+from engine.auto_broadphase import BROADPHASE_MODES
+from engine.fixed_step import CATCH_UP_POLICIES
 
-def render_ui(window_width, window_height, scene_manager=None, world_setting=None, renderer=None, selected_object=None):
+def _apply(post, fn, *args):
+    # Setting changes go through the simulation's command channel when one is given
+    if post:
+        post(fn, *args)
+    else:
+        fn(*args)
+
+def _set_broadphase(world_setting, scene_manager, mode):
+    world_setting.broadphase = mode
+    if scene_manager:
+        scene_manager.set_broadphase(mode)
+
+def render_ui(window_width, window_height, scene_manager=None, world_setting=None, renderer=None, overlay=None, post=None):
+    # Displayed scene state comes from the published overlay (World.capture_overlay);
+    # scene_manager is only handed to the setters posted to the simulation
     # Fixed Layout: Right side, 250px width, full height
     panel_width = 250
     imgui.set_next_window_position(window_width - panel_width, 0)
@@ -16,50 +32,27 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
     
     if imgui.collapsing_header("Performance", flags=imgui.TREE_NODE_DEFAULT_OPEN)[0]:
         imgui.text(f"FPS: {imgui.get_io().framerate:.1f}")
-        if scene_manager:
-            imgui.text(f"AABB Checks: {scene_manager.aabb_checks} / {scene_manager.potential_checks}")
+        if overlay:
+            imgui.text(f"AABB Checks: {overlay['aabb_checks']} / {overlay['potential_checks']}")
+            imgui.text(f"Broadphase: {overlay['broadphase']}")
 
     reset_requested = False
-    if scene_manager:
-        label = "Resume" if scene_manager.is_paused else "Pause"
+    if scene_manager and overlay:
+        label = "Resume" if overlay["paused"] else "Pause"
         if imgui.button(label, width=imgui.get_content_region_available_width()):
-            scene_manager.is_paused = not scene_manager.is_paused
+            _apply(post, setattr, scene_manager, "is_paused", not overlay["paused"])
             
         if imgui.button("Reset World", width=imgui.get_content_region_available_width()):
             reset_requested = True
             
-        # Cat stats
-        cat_count = 0
-        cats_satiety_sum = 0
-        first_cat = None
-        
-        hamster_adults = 0
-        hamster_babies = 0
-        
-        # Single loop for stats
-        for obj in scene_manager.objects:
-            if "Cat" in obj.name:
-                cat_count += 1
-                if not first_cat:
-                    first_cat = obj
-                
-                # Get satiety for avg (expensive? no)
-                from game_objects.components.ai_component import CatAIComponent
-                c_ai = obj.get_component(CatAIComponent)
-                if c_ai:
-                    cats_satiety_sum += c_ai.satiety
-            
-            if "Hamster" in obj.name:
-                from game_objects.components.ai_component import HamsterAIComponent
-                comp = obj.get_component(HamsterAIComponent)
-                if comp:
-                    if comp.is_adult:
-                        hamster_adults += 1
-                    else:
-                        hamster_babies += 1
+        # Population stats are maintained incrementally by SceneManager
+        stats = overlay["stats"]
+        cat_count = stats.get("cats", 0)
+        hamster_adults = stats.get("adult_hamsters", 0)
+        hamster_babies = stats.get("baby_hamsters", 0)
         
         if cat_count > 0:
-            avg_satiety = cats_satiety_sum / cat_count
+            avg_satiety = stats.get("cat_satiety", 0) / cat_count
             imgui.text(f"Avg Cat Satiety: {avg_satiety:.1f}")
         
         imgui.separator()
@@ -74,6 +67,12 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
             # Field Size
             fs = world_setting.field_size
             imgui.text(f"Field: {fs[0]}x{fs[1]}")
+
+            # Broadphase Backend
+            bp_index = BROADPHASE_MODES.index(world_setting.broadphase) if world_setting.broadphase in BROADPHASE_MODES else 0
+            changed_bp, val_bp = imgui.combo("Broadphase", bp_index, BROADPHASE_MODES)
+            if changed_bp:
+                _apply(post, _set_broadphase, world_setting, scene_manager, BROADPHASE_MODES[val_bp])
             
             # Time Scale
             changed_ts, val_ts = imgui.input_float("Time Scale", world_setting.time_scale)
@@ -81,7 +80,23 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
                 # Clamp to reasonable values to prevent physics explosion
                 if val_ts < 0.0: val_ts = 0.0 
                 if val_ts > 10.0: val_ts = 10.0
-                world_setting.time_scale = val_ts
+                _apply(post, setattr, world_setting, "time_scale", val_ts)
+
+            # Fixed Timestep
+            changed_tr, val_tr = imgui.input_float("Tick Rate (Hz)", world_setting.tick_rate)
+            if changed_tr:
+                if val_tr < 10.0: val_tr = 10.0
+                if val_tr > 240.0: val_tr = 240.0
+                _apply(post, setattr, world_setting, "tick_rate", val_tr)
+            changed_ms, val_ms = imgui.input_int("Max Substeps", world_setting.max_substeps)
+            if changed_ms:
+                if val_ms < 1: val_ms = 1
+                if val_ms > 50: val_ms = 50
+                _apply(post, setattr, world_setting, "max_substeps", val_ms)
+            cu_index = CATCH_UP_POLICIES.index(world_setting.catch_up) if world_setting.catch_up in CATCH_UP_POLICIES else 0
+            changed_cu, val_cu = imgui.combo("Catch-up", cu_index, list(CATCH_UP_POLICIES))
+            if changed_cu:
+                _apply(post, setattr, world_setting, "catch_up", CATCH_UP_POLICIES[val_cu])
             
             # Move Speed
             # changed, val = imgui.slider_float("Move Speed", world_setting.move_speed, 0.1, 10.0)
@@ -92,22 +107,22 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
             imgui.text("Cat Settings")
             changed_c, val_c = imgui.slider_float("Speed##Cat", world_setting.cat_setting.move_speed, 0.1, 10.0)
             if changed_c:
-                world_setting.cat_setting.move_speed = val_c
+                _apply(post, setattr, world_setting.cat_setting, "move_speed", val_c)
             changed_cmd, val_cmd = imgui.slider_float("Move Time##Cat", world_setting.cat_setting.move_duration, 0.1, 10.0)
             if changed_cmd:
-                world_setting.cat_setting.move_duration = val_cmd
+                _apply(post, setattr, world_setting.cat_setting, "move_duration", val_cmd)
             changed_crd, val_crd = imgui.slider_float("Rest Time##Cat", world_setting.cat_setting.rest_duration, 0.1, 10.0)
             if changed_crd:
-                world_setting.cat_setting.rest_duration = val_crd
+                _apply(post, setattr, world_setting.cat_setting, "rest_duration", val_crd)
             changed_chr, val_chr = imgui.slider_float("Hunger Rate##Cat", world_setting.cat_setting.hunger_rate, 0.1, 20.0)
             if changed_chr:
-                world_setting.cat_setting.hunger_rate = val_chr
+                _apply(post, setattr, world_setting.cat_setting, "hunger_rate", val_chr)
             
             changed_cc, val_cc = imgui.input_int("Count##Cat", world_setting.cat_count)
             if changed_cc:
                 if val_cc < 0: val_cc = 0
                 if val_cc > 50: val_cc = 50
-                world_setting.cat_count = val_cc
+                _apply(post, setattr, world_setting, "cat_count", val_cc)
 
             imgui.separator()
 
@@ -115,77 +130,76 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
             imgui.text("Hamster Settings")
             changed_h, val_h = imgui.slider_float("Speed##Hamster", world_setting.hamster_setting.move_speed, 0.1, 10.0)
             if changed_h:
-                world_setting.hamster_setting.move_speed = val_h
+                _apply(post, setattr, world_setting.hamster_setting, "move_speed", val_h)
             changed_hmd, val_hmd = imgui.slider_float("Move Time##Hamster", world_setting.hamster_setting.move_duration, 0.1, 10.0)
             if changed_hmd:
-                world_setting.hamster_setting.move_duration = val_hmd
+                _apply(post, setattr, world_setting.hamster_setting, "move_duration", val_hmd)
             changed_hrd, val_hrd = imgui.slider_float("Rest Time##Hamster", world_setting.hamster_setting.rest_duration, 0.1, 10.0)
             if changed_hrd:
-                world_setting.hamster_setting.rest_duration = val_hrd
+                _apply(post, setattr, world_setting.hamster_setting, "rest_duration", val_hrd)
             
             changed_hdr, val_hdr = imgui.slider_float("Detect Radius##Hamster", world_setting.hamster_setting.detection_radius, 0.5, 5.0)
             if changed_hdr:
-                world_setting.hamster_setting.detection_radius = val_hdr
+                _apply(post, setattr, world_setting.hamster_setting, "detection_radius", val_hdr)
 
             changed_hmr, val_hmr = imgui.slider_float("Mating Range##Hamster", world_setting.hamster_setting.mating_search_range, 1.0, 10.0)
             if changed_hmr:
-                world_setting.hamster_setting.mating_search_range = val_hmr
+                _apply(post, setattr, world_setting.hamster_setting, "mating_search_range", val_hmr)
             
             changed_hc, val_hc = imgui.input_int("Count##Hamster", world_setting.hamster_count)
             if changed_hc:
                 # Clamp value
                 if val_hc < 1: val_hc = 1
                 if val_hc > 100: val_hc = 100
-                world_setting.hamster_count = val_hc
+                _apply(post, setattr, world_setting, "hamster_count", val_hc)
                 
         if renderer:
             _, renderer.show_aabb = imgui.checkbox("Show AABB (Red)", renderer.show_aabb)
             _, renderer.show_sphere = imgui.checkbox("Show Sphere (Green)", renderer.show_sphere)
+            _, renderer.show_hamster_bars = imgui.checkbox("Show Hamster Growth/Cooldown", renderer.show_hamster_bars)
         
     imgui.end()
 
     # Inspector Window (Top Left)
-    if selected_object:
+    inspector = overlay["inspector"] if overlay else None
+    if inspector:
         imgui.set_next_window_position(10, 10, imgui.ONCE)
         imgui.set_next_window_size(200, 300, imgui.ONCE)
         imgui.begin("Inspector", flags=imgui.WINDOW_NO_COLLAPSE)
         
-        imgui.text(f"Name: {selected_object.name}")
+        imgui.text(f"Name: {inspector['name']}")
         imgui.separator()
         
         # Icon
-        if hasattr(selected_object, 'material') and selected_object.material and selected_object.material.texture_id:
+        if inspector["texture_id"]:
             # Display image (texture_id, width, height)
             # Use fixed size for icon
-            imgui.image(selected_object.material.texture_id, 64, 64, uv0=(0, 1), uv1=(1, 0))
+            # Flip V within the material's UV rect (an atlas sprite or the whole texture)
+            u, v, w, h = inspector["uv_rect"]
+            imgui.image(inspector["texture_id"], 64, 64, uv0=(u, v + h), uv1=(u + w, v))
             imgui.separator()
             
         # Stats
-        # Try to find AI Component
-        from game_objects.components.ai_component import BaseAIComponent, CatAIComponent, HamsterAIComponent
-        
-        # We need to access components. Object doesn't expose list easily but has get_component
-        # Let's try casting
-        ai = selected_object.get_component(BaseAIComponent)
+        ai = inspector["ai"]
         if ai:
             imgui.text("AI Stats:")
-            imgui.text(f"State: {'Moving' if ai.is_moving else 'Resting'}")
-            imgui.text(f"Move Speed: {ai.move_speed:.1f}")
-            imgui.text(f"Move Duration: {ai.move_duration:.1f}")
-            imgui.text(f"Rest Duration: {ai.rest_duration:.1f}")
+            imgui.text(f"State: {'Moving' if ai['is_moving'] else 'Resting'}")
+            imgui.text(f"Move Speed: {ai['move_speed']:.1f}")
+            imgui.text(f"Move Duration: {ai['move_duration']:.1f}")
+            imgui.text(f"Rest Duration: {ai['rest_duration']:.1f}")
             
-            if isinstance(ai, CatAIComponent):
-                imgui.text(f"Satiety: {ai.satiety:.1f}")
-                imgui.text(f"Hunger Rate: {ai.hunger_rate:.1f}")
+            if "satiety" in ai: # Cat
+                imgui.text(f"Satiety: {ai['satiety']:.1f}")
+                imgui.text(f"Hunger Rate: {ai['hunger_rate']:.1f}")
                 
-            if isinstance(ai, HamsterAIComponent):
-                imgui.text(f"Gender: {'Male' if ai.gender == 0 else 'Female'}")
-                imgui.text(f"Age: {'Adult' if ai.is_adult else 'Baby'}")
-                if not ai.is_adult:
-                    imgui.text(f"Growth: {ai.growth_timer:.1f}/10.0")
-                imgui.text(f"Repro Cooldown: {ai.repro_timer:.1f}")
-                imgui.text(f"Detect Radius: {ai.detection_radius:.1f}")
-                imgui.text(f"Mating Range: {ai.repro_range:.1f}")
+            if "gender" in ai: # Hamster
+                imgui.text(f"Gender: {'Male' if ai['gender'] == 0 else 'Female'}")
+                imgui.text(f"Age: {'Adult' if ai['is_adult'] else 'Baby'}")
+                if not ai["is_adult"]:
+                    imgui.text(f"Growth: {ai['growth_timer']:.1f}/10.0")
+                imgui.text(f"Repro Cooldown: {ai['repro_timer']:.1f}")
+                imgui.text(f"Detect Radius: {ai['detection_radius']:.1f}")
+                imgui.text(f"Mating Range: {ai['repro_range']:.1f}")
 
         imgui.end()
 
@@ -195,78 +209,70 @@ def render_ui(window_width, window_height, scene_manager=None, world_setting=Non
     imgui.set_next_window_size(window_width - panel_width, log_height)
     
     imgui.begin("Log History", flags=flags)
-    if scene_manager and scene_manager.logs:
-        # Show last 10 logs visible or scroll
-        for log in scene_manager.logs[-50:]: # Simple display
-             imgui.text(log)
+    if overlay:
+        # Only the displayed records are formatted
+        for record in overlay["logs"]: # Simple display
+             imgui.text(format_record(record))
     imgui.end()
     
     return reset_requested
 
-def render_status_bars(scene_manager, view_matrix, proj_matrix, viewport):
-    if not scene_manager:
+def _draw_bar(draw_list, x, y, w, h, ratio, col):
+    # Background (Black, 2px larger) + Foreground
+    padding = 2
+    draw_list.add_rect_filled(x - padding, y - padding, x + w + padding, y + h + padding, imgui.get_color_u32_rgba(0, 0, 0, 1))
+    draw_list.add_rect_filled(x, y, x + w * ratio, y + h, col)
+
+def render_status_bars(overlay, view_matrix, proj_matrix, viewport, show_hamsters=False):
+    if not overlay:
         return
         
     draw_list = imgui.get_background_draw_list()
-    
-    # Pre-transpose matrices for glu (as done in main/world selection logic)
-    # View/Proj from world are already "Row-Linked"? main.py passes `current_view_matrix` which is Transposed?
-    # In world.py select_object, we did: `view_d = view_matrix.transpose()`
-    # We should do the same here if main passes the same matrix.
-    # We will assume passed matrices are the global ones from main.
-    
-    try:
-        view_d = np.ascontiguousarray(view_matrix.transpose(), dtype=np.float64)
-        proj_d = np.ascontiguousarray(proj_matrix.transpose(), dtype=np.float64)
-    except:
+    viewport = np.asarray(viewport)
+
+    # Cat satiety bars, positioned above the head (cat scale 0.5 -> top at about Y + 0.25)
+    positions, ratios = overlay["cat_bars"]
+    if len(positions):
+        points = positions.copy()
+        points[:, 1] += 0.4
+        w = 40
+        h = 6
+        screen, visible = world_to_screen(points, view_matrix, proj_matrix, viewport, margin=w)
+
+        for i in np.flatnonzero(visible).tolist():
+            ratio = float(ratios[i])
+            if ratio > 0.75:
+                col = imgui.get_color_u32_rgba(0, 1, 0, 1) # Green
+            elif ratio > 0.30:
+                col = imgui.get_color_u32_rgba(1, 1, 0, 1) # Yellow
+            else:
+                col = imgui.get_color_u32_rgba(1, 0, 0, 1) # Red
+            sx, sy = screen[i].tolist()
+            _draw_bar(draw_list, sx - w/2, sy, w, h, ratio, col)
+
+    if show_hamsters and overlay["hamster_bars"] is not None:
+        render_hamster_bars(overlay["hamster_bars"], draw_list, view_matrix, proj_matrix, viewport)
+
+def render_hamster_bars(hamster_bars, draw_list, view_matrix, proj_matrix, viewport):
+    # Growth (babies, blue) and mating cooldown (magenta) bars above each hamster
+    positions, growth_ratios, cooldown_ratios = hamster_bars
+    if not len(positions):
         return
 
-    for obj in scene_manager.objects:
-        if "Cat" in obj.name:
-            # Check Satiety
-            ai = obj.get_component(CatAIComponent)
-            if ai:
-                satiety = ai.satiety
-                ratio = satiety / 100.0
-                
-                # Position above head (Cat is at Y=2.0 usually? No, moved to random)
-                # Cat Scale 0.5. Top is roughly +0.25 Y?
-                # Actually Cat is a Quad on Z plane?
-                # "cat.transform.position.SetY(2.0)" in Reset WAS old code. New code randomizes.
-                # It's on XY plane. Z=-0.1 for Floor. Objects at 0?
-                # World.py: `cat.transform.scale.Set(0.5)`. Quad is unit size centered.
-                # So visual top is Y + 0.25 (approx).
-                # Let's add offset Y + 0.4
-                
-                wx = obj.transform.position.X()
-                wy = obj.transform.position.Y() + 0.4
-                wz = obj.transform.position.Z()
-                
-                # Project
-                coords = gluProject(wx, wy, wz, view_d, proj_d, viewport)
-                if coords:
-                    sx, sy, sz = coords
-                    # Invert Y for ImGui
-                    sy = viewport[3] - sy
-                    
-                    # Draw Bar
-                    w = 40
-                    h = 6
-                    x = sx - w/2
-                    y = sy
-                    
-                    # Background (Black, 2px larger)
-                    padding = 2
-                    draw_list.add_rect_filled(x - padding, y - padding, x + w + padding, y + h + padding, imgui.get_color_u32_rgba(0, 0, 0, 1))
-                    
-                    # Determine Color
-                    if ratio > 0.75:
-                        col = imgui.get_color_u32_rgba(0, 1, 0, 1) # Green
-                    elif ratio > 0.30:
-                        col = imgui.get_color_u32_rgba(1, 1, 0, 1) # Yellow
-                    else:
-                        col = imgui.get_color_u32_rgba(1, 0, 0, 1) # Red
+    points = positions.copy()
+    points[:, 1] += 0.2
+    w = 20
+    h = 3
+    screen, visible = world_to_screen(points, view_matrix, proj_matrix, viewport, margin=w)
 
-                    # Foreground
-                    fw = w * ratio
-                    draw_list.add_rect_filled(x, y, x + fw, y + h, col)
+    growth_col = imgui.get_color_u32_rgba(0.3, 0.6, 1, 1)
+    cooldown_col = imgui.get_color_u32_rgba(1, 0.3, 1, 1)
+    for i in np.flatnonzero(visible).tolist():
+        growth = float(growth_ratios[i])
+        cooldown = float(cooldown_ratios[i])
+        sx, sy = screen[i].tolist()
+        if growth:
+            _draw_bar(draw_list, sx - w/2, sy, w, h, growth, growth_col)
+            sy += h + 3
+        if cooldown:
+            _draw_bar(draw_list, sx - w/2, sy, w, h, cooldown, cooldown_col)